@@ -0,0 +1,232 @@
+"""Array-backed genetic algorithm.
+
+Same algorithm as `genutils.geneticAlgorithm`, but the population is a
+single (pop_size x IND_SIZE) int32 matrix with a fitness vector, and
+crossover, mutation and cloning are whole-array mask operations driven
+by a NumPy `Generator`. The result is converted back to DEAP individuals
+so that `runSecondPhase` and the GUI can use it unchanged.
+"""
+
+import contextlib
+import random
+import time
+import numpy as np
+from deap import creator
+import datareader as dr
+from genutils import evaluatePopulation, selProbabilisticTournamentIndices, stopReason, publishProgress
+from genutils import penaltyCache, IND_SIZE, MAX_STAGNATION
+
+# Operator settings matching `genutils.getToolbox` and the mate call of the GA loop
+TOURNAMENT_SIZE = 3
+TOURNAMENT_P = 0.7
+CX_INDPB = 0.5
+MUT_INDPB = 0.2
+
+def randomMovies(rng : np.random.Generator, shape, low : int, high : int, pool : np.ndarray = None) -> np.ndarray:
+    """Draw an int32 array of movie indices, uniformly from `pool` if given, otherwise from [low, high]."""
+    if pool is not None:
+        return np.asarray(pool, dtype=np.int32)[rng.integers(0, len(pool), size=shape)]
+    return rng.integers(low, high + 1, size=shape, dtype=np.int32)
+
+class ArrayPopulation:
+    """A population stored as a gene matrix and a fitness vector.
+
+    Attributes:
+        genes: int32 array of shape (pop_size, IND_SIZE) of movie indices.
+        fitness: float64 array of shape (pop_size,), lower is better.
+    """
+
+    def __init__(self, genes : np.ndarray, fitness : np.ndarray = None):
+        self.genes = genes
+        self.fitness = fitness
+
+    @classmethod
+    def random(cls, pop_size : int, rng : np.random.Generator, low : int, high : int, size : int = IND_SIZE, pool : np.ndarray = None) -> "ArrayPopulation":
+        """Create a population of movie indices drawn uniformly from `pool`, or from [low, high] if pool is None."""
+        return cls(randomMovies(rng, (pop_size, size), low, high, pool))
+
+    def evaluate(self, userInput : dict, rows : np.ndarray = None) -> int:
+        """(Re-)compute the fitness of the given rows (all rows if None).
+
+        Returns:
+            The number of individuals evaluated.
+        """
+        if rows is None:
+            self.fitness = evaluatePopulation(self.genes, userInput)
+            return len(self.genes)
+        if len(rows):
+            self.fitness[rows] = evaluatePopulation(self.genes[rows], userInput)
+        return len(rows)
+
+    def take(self, rows : np.ndarray) -> "ArrayPopulation":
+        """Return a copy made of the given rows (the array version of cloning)."""
+        return ArrayPopulation(self.genes[rows], self.fitness[rows])
+
+    def best(self):
+        """Return the best individual as a DEAP individual with its fitness set."""
+        row = int(np.argmin(self.fitness))
+        ind = creator.Individual(self.genes[row].tolist())
+        ind.fitness.values = (float(self.fitness[row]),)
+        return ind
+
+    def toIndividuals(self) -> list:
+        """Convert to DEAP individuals with their fitness set, best first (like `tools.selBest`)."""
+        order = np.argsort(self.fitness, kind="stable")
+        individuals = []
+        for row in order:
+            ind = creator.Individual(self.genes[row].tolist())
+            ind.fitness.values = (float(self.fitness[row]),)
+            individuals.append(ind)
+        return individuals
+
+def cxUniformArray(genes : np.ndarray, rng : np.random.Generator, cxpb : float, indpb=CX_INDPB) -> np.ndarray:
+    """Uniform crossover of consecutive row pairs (0-1, 2-3, ...) in place.
+
+    Each pair is mated with probability cxpb; within a mated pair every
+    gene is swapped with probability indpb.
+
+    Returns:
+        A boolean array marking the rows that were mated.
+    """
+    pairs = len(genes) // 2
+    first, second = genes[0:2 * pairs:2], genes[1:2 * pairs:2]
+    mated = rng.random(pairs) < cxpb
+    swap = (rng.random(first.shape) < indpb) & mated[:, None]
+    first[swap], second[swap] = second[swap], first[swap]
+
+    matedRows = np.zeros(len(genes), dtype=bool)
+    matedRows[0:2 * pairs:2] = mated
+    matedRows[1:2 * pairs:2] = mated
+    return matedRows
+
+def mutRandomResetArray(genes : np.ndarray, rng : np.random.Generator, mutpb : float, low : int, high : int, indpb=MUT_INDPB, pool=None) -> np.ndarray:
+    """Random-reset mutation in place.
+
+    Each row is mutated with probability mutpb; within a mutated row every
+    gene is reset with probability indpb to a random movie of `pool`, or
+    to a random index in [low, high] if pool is None.
+
+    Returns:
+        A boolean array marking the rows that were mutated.
+    """
+    mutated = rng.random(len(genes)) < mutpb
+    reset = (rng.random(genes.shape) < indpb) & mutated[:, None]
+    genes[reset] = randomMovies(rng, int(reset.sum()), low, high, pool)
+    return mutated
+
+def evolveArrayGeneration(population : ArrayPopulation, rng : np.random.Generator, userInput : dict, cxpb : float, mutpb : float,
+                          low : int, high : int, pool=None, recorder=None) -> ArrayPopulation:
+    """Produce the next generation: selection, cloning, crossover, mutation and evaluation.
+
+    Array counterpart of `genutils.evolveGeneration`.
+
+    Args:
+        population: Current evaluated population.
+        rng: NumPy Generator driving every random draw.
+        userInput: Dict with user preference parameters used by the evaluator.
+        cxpb: Crossover probability applied per pair of individuals.
+        mutpb: Mutation probability applied per individual.
+        low, high: Range of movie indices used by the mutation.
+        pool: Optional candidate pool used by the mutation instead of [low, high].
+        recorder: Optional `telemetry.GenerationRecorder` timing each step.
+
+    Returns:
+        The new evaluated population.
+    """
+    phase = recorder.phase if recorder else lambda name: contextlib.nullcontext()
+
+    with phase("select"):
+        selected = selProbabilisticTournamentIndices(population.fitness, len(population.genes), rng, TOURNAMENT_SIZE, TOURNAMENT_P)
+
+    with phase("clone"):
+        offspring = population.take(selected)
+
+    with phase("mate"):
+        invalid = cxUniformArray(offspring.genes, rng, cxpb)
+
+    with phase("mutate"):
+        invalid |= mutRandomResetArray(offspring.genes, rng, mutpb, low, high, pool=pool)
+
+    # Re-evaluate the rows touched by crossover or mutation in a single batch
+    with phase("evaluate"):
+        evaluated = offspring.evaluate(userInput, np.flatnonzero(invalid))
+    if recorder:
+        recorder.count_evaluations(evaluated)
+    return offspring
+
+def arrayGeneticAlgorithm(userInput : dict, pop_size=100, cxpb=0.2, mutpb=0.02, min_iter = 5, max_iter = 15, seed=None,
+                          low=0, high=None, pool=None, stats=None, recorder=None, progress=None, deadline=None, cancel=None, seeds=None) -> list:
+    """Run the genetic algorithm on an `ArrayPopulation`.
+
+    Same loop and stopping rule as `genutils.geneticAlgorithm`.
+
+    Args:
+        userInput: Dict with user preference parameters used by the evaluator.
+        pop_size: Population size.
+        cxpb: Crossover probability applied per pair of individuals.
+        mutpb: Mutation probability applied per individual.
+        min_iter: Minimum number of generations to run before allowing early stop.
+        max_iter: Maximum number of generations to run.
+        seed: Seed of the NumPy Generator (or a Generator). None draws
+            the seed from the `random` module, so `random.seed` makes
+            runs reproducible as with the DEAP engine.
+        low, high: Range of movie indices (high defaults to the last movie of the catalog).
+        pool: Optional candidate pool (see `genutils.candidatePool`) that
+            initialization and mutation sample from instead of [low, high].
+        stats: Optional dict that receives run statistics (`generations`, `stopped`).
+        recorder: Optional `telemetry.GenerationRecorder`.
+        progress, deadline, cancel: Anytime controls, see `genutils.geneticAlgorithm`.
+        seeds: Optional gene lists placed in the first rows of the initial population.
+
+    Returns:
+        A list of DEAP individuals sorted best first, like `tools.selBest`.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+    if high is None:
+        high = dr.getStore().size - 1
+    if stats is None:
+        stats = {}
+
+    started = time.monotonic()
+    if recorder:
+        recorder.start_run(max_iter, penaltyCache)
+        recorder.start_generation(0)
+
+    population = ArrayPopulation.random(pop_size, rng, low, high, pool=pool)
+    if seeds:
+        population.genes[:len(seeds)] = seeds
+    evaluated = population.evaluate(userInput)
+    if recorder:
+        recorder.count_evaluations(evaluated)
+        recorder.end_generation_fitness(population.fitness, 0)
+    publishProgress(progress, 0, max_iter, population.best(), 0, started, deadline)
+
+    best_prev = population.fitness.min()
+    stagnation_counter = 0
+    gen = 0
+
+    while gen < max_iter and stagnation_counter < MAX_STAGNATION:
+        stats["stopped"] = stopReason(deadline, cancel)
+        if stats["stopped"]:
+            break
+        gen += 1
+        if recorder:
+            recorder.start_generation(gen)
+
+        if gen > min_iter:
+            best_now = population.fitness.min()
+            if best_now < best_prev:
+                best_prev = best_now
+                stagnation_counter = 0
+            else:
+                stagnation_counter += 1
+
+        population = evolveArrayGeneration(population, rng, userInput, cxpb, mutpb, low, high, pool, recorder)
+        if recorder:
+            recorder.end_generation_fitness(population.fitness, stagnation_counter)
+        publishProgress(progress, gen, max_iter, population.best(), stagnation_counter, started, deadline)
+
+    stats["generations"] = gen
+    return population.toIndividuals()
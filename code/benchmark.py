@@ -0,0 +1,249 @@
+"""Microbenchmarks of the recommender stages on synthetic catalogs.
+
+Writes synthetic parquet catalogs with the schema of `dataset.parquet`
+(10k to 10M rows by default), then times each stage on every catalog:
+dataset load, `getMovieParameterList`, `genutils.evaluate`,
+`selProbabilisticTournament`, `geneticAlgorithm`, `extractPreferences`
+and `runSecondPhase`. Each result holds the mean and best wall time over
+the repetitions and the peak memory allocated during one extra run
+(measured with tracemalloc), and the whole report is written as JSON.
+
+`python benchmark.py --sizes 10000 100000 --output benchmark.json`
+
+Generated catalogs are kept in `--data-dir` and reused by later runs.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import datareader as dr
+import genutils
+from genutils import geneticAlgorithm, getToolbox, evaluate, selProbabilisticTournament
+from secondphase import runSecondPhase
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+DATA_DIR = "benchmark_data"
+OUTPUT_FILE = "benchmark.json"
+REPEAT = 5
+
+# Rows generated (and written as one row group) at a time
+GENERATION_CHUNK = 500_000
+
+# Calls per repetition of the per-item benchmarks
+LOOKUPS = 100
+EVALUATIONS = 1000
+TOURNAMENT_POPULATION = 1000
+
+BENCHMARK_INPUT = {"Periodo": range(1990, 2011), "Lunghezza": 110, "Generi": ["Drama", "Crime", "Thriller"]}
+GA_PARAMS = {"pop_size": 100, "cxpb": 0.7, "mutpb": 0.11, "min_iter": 10, "max_iter": 20}
+
+EXTRA_GENRES = ["Music", "Biography", "Documentary", "Family"]
+
+def format_lists(names, ids: np.ndarray, lengths: np.ndarray) -> list:
+    """Format rows of item ids as stringified lists like "['a', 'b']" ("[]" for empty rows).
+
+    Args:
+        names: Callable mapping an id to its name, e.g. "Star {}".format.
+        ids: (rows x most) array of drawn ids.
+        lengths: Number of ids kept in each row.
+    """
+    return ["[" + ", ".join(f"'{names(item)}'" for item in row[:length]) + "]" for row, length in zip(ids, lengths)]
+
+def generate_chunk(rng: np.random.Generator, start: int, rows: int, total: int) -> pd.DataFrame:
+    """Generate `rows` synthetic movies, numbered from `start`, for a catalog of `total` movies.
+
+    Director, star and keyword vocabularies grow with the catalog size
+    so that list matching and posting lists scale like real data. Only
+    the drawn names are formatted, so memory is bounded by `rows`.
+    """
+    genres = dr.GENRES + EXTRA_GENRES
+
+    years = rng.integers(1960, 2025, size=rows)
+    months = rng.integers(1, 13, size=rows)
+    days = rng.integers(1, 29, size=rows)
+    release_dates = [f"{y}-{m:02d}-{d:02d}" for y, m, d in zip(years, months, days)]
+
+    minutes = rng.integers(60, 200, size=rows)
+    durations = [f"{m // 60}h {m % 60}m" if m % 60 else f"{m // 60}h" for m in minutes]
+
+    ratings = np.round(rng.uniform(1, 9.5, size=rows), 1)
+    ratings[rng.random(rows) < 0.05] = np.nan
+
+    def list_column(names, vocabulary, most):
+        lengths = rng.integers(0, most + 1, size=rows)
+        return format_lists(names, rng.integers(0, vocabulary, size=(rows, most)), lengths)
+
+    numbers = range(start, start + rows)
+    return pd.DataFrame({
+        "title": [f"Movie {i}" for i in numbers],
+        "duration": durations,
+        "rating": ratings,
+        "release_date": release_dates,
+        "genres": list_column(genres.__getitem__, len(genres), 3),
+        "directors": list_column("Director {}".format, max(100, total // 5), 2),
+        "stars": list_column("Star {}".format, max(300, total), 4),
+        "keywords": list_column("keyword{}".format, max(200, total // 10), 3),
+        "description": [f"Synthetic movie number {i}." for i in numbers]
+    })
+
+def generate_catalog(rows: int, path: str, seed: int = 0, chunk_size: int = GENERATION_CHUNK):
+    """Write a synthetic catalog of `rows` movies to a parquet file, chunk by chunk.
+
+    Args:
+        rows: Number of movies.
+        path: Parquet file to write.
+        seed: Seed of the generator, so a size always gives the same catalog.
+        chunk_size: Rows generated and written at a time.
+    """
+    rng = np.random.default_rng(seed)
+    writer = None
+    try:
+        for start in range(0, rows, chunk_size):
+            chunk = generate_chunk(rng, start, min(chunk_size, rows - start), rows)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def catalog_path(rows: int, data_dir: str) -> str:
+    """Return the path of the synthetic catalog of `rows` movies, generating it if missing."""
+    path = os.path.join(data_dir, f"catalog_{rows}.parquet")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generating {rows} rows -> {path}")
+        generate_catalog(rows, path)
+    return path
+
+def measure(fn, repeat: int = REPEAT) -> dict:
+    """Time `fn` over `repeat` calls, then measure its peak allocation in one more call.
+
+    Tracing is kept out of the timed calls, as tracemalloc slows Python code down.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()): #geneticAlgorithm prints its generation count
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {"mean_s": sum(times) / len(times), "min_s": min(times), "repeat": repeat, "peak_mb": peak / 2**20}
+
+def load_catalog(path: str) -> dict:
+    """Point `datareader` at `path` and time the cold load of the feature store.
+
+    The load is timed untraced, then repeated once under tracemalloc for its peak memory.
+    """
+    def load():
+        dr.setDatasetPath(path)
+        genutils.penaltyCache.clear()
+        dr.getStore()
+
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        load()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"mean_s": elapsed, "min_s": elapsed, "repeat": 1, "peak_mb": peak / 2**20}
+
+def benchmark_catalog(rows: int, path: str, repeat: int = REPEAT) -> list:
+    """Run every benchmark on one catalog.
+
+    Returns:
+        A list of result dicts (rows, benchmark name, timings, peak memory).
+    """
+    results = [{"benchmark": "dataset_load", **load_catalog(path)}]
+    size = dr.getStore().size
+    random.seed(0)
+    rng = np.random.default_rng(0)
+
+    lookups = rng.integers(0, size, size=LOOKUPS).tolist()
+    results.append({"benchmark": "getMovieParameterList", "calls": LOOKUPS,
+                    **measure(lambda: [dr.getMovieParameterList(i) for i in lookups], repeat)})
+
+    individuals = rng.integers(0, size, size=(EVALUATIONS, genutils.IND_SIZE)).tolist()
+    genutils.catalogPenalties(BENCHMARK_INPUT) #fill the penalty cache, as a GA run does first
+    results.append({"benchmark": "evaluate", "calls": EVALUATIONS,
+                    **measure(lambda: [evaluate(ind, BENCHMARK_INPUT) for ind in individuals], repeat)})
+
+    toolbox = getToolbox()
+    population = toolbox.population(n=TOURNAMENT_POPULATION)
+    genutils.assignFitnesses(population, toolbox, BENCHMARK_INPUT)
+    results.append({"benchmark": "selProbabilisticTournament", "population": TOURNAMENT_POPULATION,
+                    **measure(lambda: selProbabilisticTournament(population, TOURNAMENT_POPULATION), repeat)})
+
+    firstPhase = []
+    def run_ga():
+        firstPhase[:] = geneticAlgorithm(BENCHMARK_INPUT, toolbox, **GA_PARAMS)
+    results.append({"benchmark": "geneticAlgorithm", **GA_PARAMS, **measure(run_ga, repeat)})
+
+    choices = {"like": [int(m) for m in firstPhase[0][:3]], "dislike": [int(m) for m in firstPhase[0][3:]]}
+    results.append({"benchmark": "extractPreferences", **measure(lambda: dr.extractPreferences(choices), repeat)})
+
+    secondPhaseInput = BENCHMARK_INPUT | dr.extractPreferences(choices)
+    results.append({"benchmark": "runSecondPhase", "scope": "candidates",
+                    **measure(lambda: runSecondPhase(firstPhase, secondPhaseInput), repeat)})
+    results.append({"benchmark": "runSecondPhase", "scope": "catalog",
+                    **measure(lambda: runSecondPhase(firstPhase, secondPhaseInput, scope="catalog", top_k=10), repeat)})
+
+    return [{"rows": rows, **result} for result in results]
+
+def run_benchmarks(sizes: list, data_dir: str = DATA_DIR, output: str = OUTPUT_FILE, repeat: int = REPEAT) -> dict:
+    """Benchmark every catalog size and write the JSON report to `output`."""
+    report = {
+        "created": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "results": []
+    }
+    for rows in sizes:
+        path = catalog_path(rows, data_dir)
+        print(f"Benchmarking {rows} rows...")
+        for result in benchmark_catalog(rows, path, repeat):
+            name = result["benchmark"] + (f" ({result['scope']})" if "scope" in result else "")
+            print(f"  {name:<38} {result['mean_s'] * 1000:10.2f} ms  peak {result['peak_mb']:9.1f} MB")
+            report["results"].append(result)
+
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"Report saved as: {output}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the recommender stages on synthetic catalogs.")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Catalog sizes in rows", default=SIZES)
+    parser.add_argument("--data-dir", help="Directory of the generated catalogs", default=DATA_DIR)
+    parser.add_argument("--output", help="JSON report to write", default=OUTPUT_FILE)
+    parser.add_argument("--repeat", type=int, help="Timed repetitions per benchmark", default=REPEAT)
+
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.data_dir, args.output, args.repeat)
@@ -0,0 +1,28 @@
+"""Shared fixtures: a small in-memory catalog with the awkward cases of real data."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import datareader as dr
+
+CATALOG = pd.DataFrame({
+    "duration": ["1h 30m", "2h", "45m", None, "2h 15m", "1h 50m", "3h 5m", "1h"],
+    "rating": [7.5, 6.1, np.nan, 8.0, 5.5, 9.1, 7.0, 4.2],
+    "release_date": ["1994-09-23", "2001-05-01", "1968-01-01", None, "2010-07-16", "1999-03-31", "2023-12-01", "1985-06-07"],
+    "genres": ["['Drama', 'Crime']", "['Drama', 'Drama']", "[]", None, "['Sci-Fi', 'Music']",
+               "['Crime', 'Thriller', 'Crime']", "['Music']", "['Comedy']"],
+    "directors": ["['Frank Darabont']", "['Ang Lee']", "[]", None, "['Christopher Nolan']",
+                  "['Ang Lee', 'Frank Darabont']", "['Christopher Nolan']", "[]"],
+    "stars": ["['Tim Robbins']", "[]", None, "['Ann Lee']", "['Leonardo DiCaprio']", "[]", "[]", "['Bill Murray']"],
+    "keywords": ["['prison', 'hope']", "['family']", "[]", None, "['dream', 'heist']",
+                 "['prison', 'heist', 'prison']", "['dream']", "['prison']"]
+})
+
+@pytest.fixture
+def store(monkeypatch):
+    """Install a feature store built from `CATALOG` as the current catalog."""
+    dr.resetCatalog() #new catalog version, so cached penalty vectors are not reused
+    featureStore = dr.MovieFeatureStore(CATALOG)
+    monkeypatch.setattr(dr, "store", featureStore)
+    yield featureStore
+    dr.resetCatalog()
@@ -1,4 +1,136 @@
+"""Build the catalog files used by the recommender.
+
+Reads the tagged CSV (or an existing parquet file), validates its rows,
+writes `dataset.parquet` and a preprocessed bundle next to it: a
+directory of `.npy` arrays (numeric columns, genre bitmasks and CSR
+offsets/ids for the list columns) plus a `manifest.json`. `datareader`
+memory-maps the bundle at startup instead of parsing the parquet file,
+so several processes share the same pages.
+
+Run this file as a script:
+
+`python convert.py --input dataset_refined_keywords3.csv --output-parquet dataset.parquet`
+"""
+
+import argparse
+import os
+import re
+from datetime import datetime, timezone
 import pandas as pd
+import datareader as dr
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+INPUT_FILE = "dataset_refined_keywords3.csv"
+OUTPUT_PARQUET = "dataset.parquet"
+
+# Number of offending rows listed per problem in the report
+MAX_REPORTED_ROWS = 10
+
+# Same grammar as `datareader.parseDurationColumn`: hours and minutes, in either order, separated by whitespace
+DURATION_PATTERN = re.compile(r"^\s*(\d+h(\s+\d+m)?|\d+m(\s+\d+h)?)?\s*$")
+DATE_PATTERN = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+
+def readInput(path: str) -> pd.DataFrame:
+    """Read the input catalog from a CSV or parquet file."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def validateCatalog(frame: pd.DataFrame) -> dict:
+    """Check the rows of a catalog and collect malformed values.
+
+    Missing values are allowed (the scoring functions treat them as
+    unknown); values that are present but cannot be parsed are reported.
+
+    Args:
+        frame: The catalog DataFrame.
+
+    Returns:
+        A dict mapping each problem to {"count": n, "rows": [first row indices]}.
+    """
+    def present(column):
+        return frame[column].notna() & (frame[column].astype("string").str.strip() != "")
+
+    problems = {}
+    missing = [c for c in dr.SCORING_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    checks = {
+        "malformed duration": present("duration") & ~frame["duration"].astype("string").str.match(DURATION_PATTERN).fillna(False),
+        "malformed release_date": present("release_date") & ~frame["release_date"].astype("string").str.strip().str.match(DATE_PATTERN).fillna(False),
+        "rating out of range": pd.to_numeric(frame["rating"], errors="coerce").lt(0) | pd.to_numeric(frame["rating"], errors="coerce").gt(10),
+        "non-numeric rating": frame["rating"].notna() & pd.to_numeric(frame["rating"], errors="coerce").isna(),
+    }
+    for column in dr.LIST_COLUMNS:
+        values = frame[column]
+        isString = values.map(lambda v: isinstance(v, str))
+        checks[f"malformed {column} list"] = isString & present(column) & ~values.astype("string").str.strip().str.match(r"^\[.*\]$").fillna(False)
+
+    for problem, mask in checks.items():
+        rows = frame.index[mask.to_numpy(dtype=bool)]
+        if len(rows):
+            problems[problem] = {"count": int(len(rows)), "rows": [int(r) for r in rows[:MAX_REPORTED_ROWS]]}
+    return problems
+
+def printReport(problems: dict, rows: int):
+    """Print the validation problems found by `validateCatalog`."""
+    if not problems:
+        print(f"Validated {rows} rows: no problems found.")
+        return
+    print(f"Validated {rows} rows:")
+    for problem, details in problems.items():
+        print(f"  {problem}: {details['count']} rows (e.g. {details['rows']})")
+
+def main(input_file: str = None, output_parquet: str = None, bundle_dir: str = None, strict: bool = False):
+    """Script entry point: validate the input, write the parquet file and the bundle.
+
+    Args:
+        input_file: CSV or parquet file to convert.
+        output_parquet: Parquet file to write (skipped if it is the input file).
+        bundle_dir: Bundle directory (defaults to the parquet path with a `.bundle` extension).
+        strict: If True, stop without writing anything when validation finds problems.
+    """
+    input_file = input_file or INPUT_FILE
+    output_parquet = output_parquet or OUTPUT_PARQUET
+    bundle_dir = bundle_dir or os.path.splitext(output_parquet)[0] + ".bundle"
+
+    print("Loading dataset...")
+    frame = readInput(input_file)
+
+    print("Validating rows...")
+    problems = validateCatalog(frame)
+    printReport(problems, len(frame))
+    if problems and strict:
+        raise SystemExit("Validation failed, nothing written.")
+
+    if os.path.abspath(input_file) != os.path.abspath(output_parquet):
+        print("Saving parquet...")
+        frame.to_parquet(output_parquet)
+
+    print("Building bundle...")
+    store = dr.MovieFeatureStore(frame)
+    stat = os.stat(output_parquet)
+    store.save(bundle_dir, {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "source": {"file": os.path.basename(output_parquet), "size": stat.st_size, "mtime": int(stat.st_mtime)},
+        "validation": problems
+    })
+
+    print("Done.")
+    print(f"Saved as: {output_parquet} and {bundle_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build dataset.parquet and its preprocessed bundle.")
+    parser.add_argument("--input", dest="input_file", help="Path to the input CSV or parquet file", default=INPUT_FILE)
+    parser.add_argument("--output-parquet", dest="output_parquet", help="Path of the parquet file to write", default=OUTPUT_PARQUET)
+    parser.add_argument("--bundle-dir", dest="bundle_dir", help="Bundle directory (default: <output-parquet>.bundle)", default=None)
+    parser.add_argument("--strict", action="store_true", help="Fail instead of writing when rows are malformed")
 
-df = pd.read_csv("dataset_refined_keywords3.csv")
-df.to_parquet("dataset.parquet")
\ No newline at end of file
+    args = parser.parse_args()
+    main(input_file=args.input_file,
+         output_parquet=args.output_parquet,
+         bundle_dir=args.bundle_dir,
+         strict=args.strict)
@@ -1,18 +1,234 @@
+import os
+import sys
+import json
+import threading
 import pandas
 import numpy as np
+from eval import popcount
 
-def getDataFrame(name : str) -> pandas.DataFrame:
+# Path of the catalog. Override it with the MOVIEBUDDY_DATASET environment
+# variable or `setDatasetPath`; by default it sits next to this file.
+DATASET_PATH = os.environ.get("MOVIEBUDDY_DATASET", os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset.parquet"))
+
+# Compact mode stores repeated strings as categoricals, free text as Arrow
+# strings and numbers in narrow types. Enable it with MOVIEBUDDY_COMPACT=1
+# or `setCompactMode`.
+COMPACT_CATALOG = os.environ.get("MOVIEBUDDY_COMPACT", "0") == "1"
+
+# String columns with at most this fraction of distinct values are categorical
+CATEGORY_THRESHOLD = 0.5
+
+# Columns needed to score movies; title/description are only read by the GUIs
+SCORING_COLUMNS = ["duration", "rating", "release_date", "genres", "directors", "stars", "keywords"]
+
+# Genres the user can pick from. They always get the lowest bits of the
+# genre bitmask; genres that only appear in the dataset are appended after.
+GENRES = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime", "Drama",
+    "Fantasy", "Historical", "Horror", "Mystery", "Romance", "Sci-Fi",
+    "Sport", "Thriller", "War", "Western"
+]
+
+def getDataFrame(name : str, columns : list = None, compact : bool = False) -> pandas.DataFrame:
     """Load a parquet file into a pandas DataFrame.
 
     Args:
         name: Path to the parquet file.
+        columns: Optional list of columns to read (all columns if None).
+        compact: If True, convert the columns with `compactFrame`.
 
     Returns:
         A pandas.DataFrame containing the file data.
     """
-    return pandas.read_parquet(name) 
+    frame = pandas.read_parquet(name, columns=columns) 
+    return compactFrame(frame) if compact else frame
+
+def compactFrame(frame : pandas.DataFrame) -> pandas.DataFrame:
+    """Convert a catalog frame to memory-compact dtypes.
+
+    - String columns with many repeated values (genres, directors,
+      durations...) become categoricals, so each distinct string is
+      stored once.
+    - Other string columns (title, description) become Arrow-backed
+      strings.
+    - Missing strings become "", so callers still get a falsy str.
+    - Numeric columns are downcast to the narrowest type that holds them
+      (e.g. rating to float32, year to int16).
+
+    The parsed numeric year and duration live in the `MovieFeatureStore`.
+
+    Args:
+        frame: DataFrame as read from the parquet file.
+
+    Returns:
+        A new DataFrame with the converted columns.
+    """
+    compact = {}
+    for name, column in frame.items():
+        if pandas.api.types.is_float_dtype(column):
+            compact[name] = pandas.to_numeric(column, downcast="float")
+        elif pandas.api.types.is_integer_dtype(column):
+            compact[name] = pandas.to_numeric(column, downcast="integer")
+        elif isinstance(column.dtype, pandas.CategoricalDtype) or pandas.api.types.infer_dtype(column, skipna=True) != "string":
+            compact[name] = column #already compact, or holds lists rather than strings
+        elif column.nunique(dropna=False) <= CATEGORY_THRESHOLD * max(len(column), 1):
+            compact[name] = column.fillna("").astype("category")
+        else:
+            compact[name] = column.fillna("").astype("string[pyarrow]")
+    return pandas.DataFrame(compact, index=frame.index)
+
+# The catalog is opened lazily: `catalog` holds the display columns read so
+# far by the GUIs and `store` the feature store, both built on first use.
+catalog = None
+store = None
+catalogVersion = 0
+catalogLock = threading.RLock()
+
+def resetCatalog():
+    """Drop the loaded columns and feature store so they are re-read on next use."""
+    global catalog, store, catalogVersion
+    with catalogLock:
+        catalog = None
+        store = None
+        catalogVersion += 1
+
+def setDatasetPath(path : str):
+    """Point the reader at another catalog and drop anything already loaded.
+
+    Args:
+        path: Path to the parquet file.
+    """
+    global DATASET_PATH
+    with catalogLock:
+        DATASET_PATH = path
+        resetCatalog()
 
-df = getDataFrame("dataset.parquet")
+def setCompactMode(compact : bool):
+    """Enable or disable compact dtypes (see `compactFrame`) and drop loaded data.
+
+    Args:
+        compact: Whether columns should be loaded in compact form.
+    """
+    global COMPACT_CATALOG
+    with catalogLock:
+        COMPACT_CATALOG = compact
+        resetCatalog()
+
+def getCatalog(columns : list) -> pandas.DataFrame:
+    """Return the catalog with (at least) the requested columns loaded.
+
+    Only columns that were not read before are loaded from disk, so
+    scoring never pays for long text columns such as `description`.
+
+    Args:
+        columns: List of column names needed by the caller.
+
+    Returns:
+        A pandas.DataFrame holding the requested columns.
+    """
+    global catalog
+    with catalogLock:
+        missing = [c for c in columns if catalog is None or c not in catalog.columns]
+        if missing:
+            loaded = getDataFrame(DATASET_PATH, missing, COMPACT_CATALOG)
+            catalog = loaded if catalog is None else catalog.join(loaded)
+        return catalog
+
+def getBundlePath() -> str:
+    """Return the bundle directory matching the dataset (see `convert.py`).
+
+    Defaults to the dataset path with a `.bundle` extension; override it
+    with the MOVIEBUDDY_BUNDLE environment variable.
+    """
+    return os.environ.get("MOVIEBUDDY_BUNDLE", os.path.splitext(DATASET_PATH)[0] + ".bundle")
+
+def readBundleManifest(path : str) -> dict:
+    """Read the `manifest.json` of a bundle directory."""
+    with open(os.path.join(path, "manifest.json")) as f:
+        return json.load(f)
+
+def bundleIsCurrent(path : str) -> bool:
+    """Tell whether a usable bundle exists for the current dataset.
+
+    The bundle must have the current layout version and, when the parquet
+    file is present, have been built from a file of the same size and
+    modification time.
+    """
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        return False
+    manifest = readBundleManifest(path)
+    if manifest.get("version") != BUNDLE_VERSION:
+        return False
+    source = manifest.get("source")
+    if source and os.path.exists(DATASET_PATH):
+        stat = os.stat(DATASET_PATH)
+        return source.get("size") == stat.st_size and source.get("mtime") == int(stat.st_mtime)
+    return True
+
+def getStore() -> "MovieFeatureStore":
+    """Return the feature store, building it on first use.
+
+    A current preprocessed bundle is memory-mapped when available;
+    otherwise the store is parsed from the scoring columns of the parquet
+    file. The raw string columns are dropped once parsed, so only the
+    store's arrays stay resident.
+    """
+    global store
+    with catalogLock:
+        if store is None:
+            bundlePath = getBundlePath()
+            if bundleIsCurrent(bundlePath):
+                store = MovieFeatureStore.fromBundle(bundlePath)
+            else:
+                store = MovieFeatureStore(getDataFrame(DATASET_PATH, SCORING_COLUMNS, COMPACT_CATALOG))
+        return store
+
+def storeMemory(featureStore : "MovieFeatureStore") -> dict:
+    """Return the approximate bytes held by each array of a feature store.
+
+    List columns held in memory also count their vocabulary strings;
+    memory-mapped arrays are counted at their full size even though they
+    live in the shared page cache.
+    """
+    sizes = {}
+    for name, value in vars(featureStore).items():
+        if isinstance(value, (np.ndarray, ListColumn)):
+            sizes[name] = value.nbytes
+            if isinstance(value, ListColumn) and value.vocabulary.dtype == object:
+                sizes[name] += sum(sys.getsizeof(item) for item in value.vocabulary)
+    return sizes
+
+def catalog_memory_report(columns : list = None) -> dict:
+    """Print and return per-column memory use of the catalog, before and after compaction.
+
+    Reads the requested columns as stored in the parquet file, converts
+    them with `compactFrame`, and measures both with deep memory usage.
+    The feature store arrays are listed too, since they are resident as
+    well.
+
+    Args:
+        columns: Columns to measure (all columns of the file if None).
+
+    Returns:
+        A dict mapping column name to a (plain_bytes, compact_bytes) tuple.
+    """
+    plain = getDataFrame(DATASET_PATH, columns)
+    compact = compactFrame(plain)
+    plainBytes = plain.memory_usage(deep=True, index=False)
+    compactBytes = compact.memory_usage(deep=True, index=False)
+
+    report = {name: (int(plainBytes[name]), int(compactBytes[name])) for name in plain.columns}
+    print(f"{'column':<16}{'dtype':>12}{'before':>14}{'after':>14}")
+    for name, (before, after) in report.items():
+        print(f"{name:<16}{str(compact[name].dtype):>12}{before:>14,}{after:>14,}")
+    totalBefore = sum(before for before, _ in report.values())
+    totalAfter = sum(after for _, after in report.values())
+    print(f"{'total':<16}{'':>12}{totalBefore:>14,}{totalAfter:>14,}")
+
+    print("\nfeature store")
+    for name, size in storeMemory(getStore()).items():
+        print(f"{name:<16}{size:>40,}")
+    return report
 
 def extractYear(date_str: str) -> int:
     """Extract the year as an integer from a date string.
@@ -93,21 +309,35 @@ def getMovieParameterList(index : int, columns = ["duration", "rating", "release
     """Retrieve selected parameter values for a movie by index.
 
     Args:
-        index: Row index in the global dataframe `df`.
+        index: Row index in the catalog.
         columns: List of columns to extract (default duration, rating, release_date, genres).
 
     Returns:
         A list containing the column values for the given index.
     """
-    row = df.loc[index, columns ].tolist()
-    return row
+    movies = getMovies([index], columns)
+    return [movies[column][0] for column in columns]
+
+def getMovies(indices, columns : list) -> dict:
+    """Retrieve selected columns for many movies with a single indexed take.
+
+    Args:
+        indices: Sequence of row indices in the catalog.
+        columns: List of columns to extract.
+
+    Returns:
+        A dict mapping each column to a numpy array of its values, in the
+        order of `indices`.
+    """
+    rows = getCatalog(columns).loc[list(indices), columns]
+    return {column: rows[column].to_numpy() for column in columns}
 
 def normalize(value):
     """Normalize stored list-like values to a Python list.
 
-    - None becomes an empty list.
+    - None and other missing values (NaN) become an empty list.
     - A string is parsed via `extractList`.
-    - Other iterable values are cast to `list`.
+    - Other iterable values (e.g. list<string> parquet cells) are cast to `list`.
 
     Args:
         value: The value to normalize.
@@ -119,15 +349,18 @@ def normalize(value):
         return []
     if isinstance(value, str):
         return extractList(value)
+    if not hasattr(value, "__iter__"):
+        return []
     return list(value)
 
 def extractPreferences(choice_dict):
     """Build a user preference dictionary from rated movie indices.
 
     The provided `choice_dict` maps categories (e.g. 'like'/'dislike') to
-    lists of movie indices. For each index, this function collects the
-    movie's actors, directors and keywords and returns a dict with
-    keys like 'actors+' / 'actors-' containing lists of unique values.
+    lists of movie indices. For each category, this function gathers the
+    actor, director and keyword ids of all its movies from the feature
+    store at once and returns a dict with keys like 'actors+' /
+    'actors-' containing lists of unique values.
 
     Args:
         choice_dict: Dict mapping 'like'/'dislike' to lists of movie indices.
@@ -144,20 +377,416 @@ def extractPreferences(choice_dict):
         "keywords-": set()
     }
 
-    COLUMNS = ["stars", "directors", "keywords"]
+    store = getStore()
+    COLUMNS = {"actors": store.stars, "directors": store.directors, "keywords": store.keywords}
 
     for category, index_list in choice_dict.items():
         sign = "+" if category == "like" else "-"
 
-        for idx in index_list:
-            actors, directors, keywords = getMovieParameterList(idx, COLUMNS)
+        for key, column in COLUMNS.items():
+            _, ids = column.entries(index_list)
+            preferences[f"{key}{sign}"].update(column.vocabulary[np.unique(ids)].tolist())
+
+    return {key: list(values) for key, values in preferences.items()}
+
+
+def parseYearColumn(column: pandas.Series) -> np.ndarray:
+    """Vectorized counterpart of `extractYear` for a whole column.
+
+    Missing or malformed dates become 0, which the scoring functions
+    treat as "unknown year".
+
+    Args:
+        column: Series of 'YYYY-MM-DD' strings.
+
+    Returns:
+        An int16 array of release years.
+    """
+    years = pandas.to_numeric(column.astype("string").str.split("-", n=1).str[0], errors="coerce")
+    return years.fillna(0).to_numpy(dtype=np.int16)
+
+def parseDurationColumn(column: pandas.Series) -> np.ndarray:
+    """Vectorized counterpart of `extractDuration` for a whole column.
+
+    Args:
+        column: Series of duration strings such as '1h 30m'.
+
+    Returns:
+        An int16 array of durations in minutes, 0 for missing values.
+    """
+    column = column.astype("string")
+    hours = pandas.to_numeric(column.str.extract(r"(?:^|\s)(\d+)h(?=\s|$)")[0], errors="coerce").fillna(0)
+    minutes = pandas.to_numeric(column.str.extract(r"(?:^|\s)(\d+)m(?=\s|$)")[0], errors="coerce").fillna(0)
+    return (hours * 60 + minutes).to_numpy(dtype=np.int16)
 
-            actors = normalize(actors)
-            directors = normalize(directors)
-            keywords = normalize(keywords)
+def parseRatingColumn(column: pandas.Series) -> np.ndarray:
+    """Vectorized counterpart of `extractRating` for a whole column.
+
+    Args:
+        column: Series of numeric ratings (may contain NaN).
+
+    Returns:
+        A float32 array of ratings with NaN replaced by 0.
+    """
+    return pandas.to_numeric(column, errors="coerce").fillna(0).to_numpy(dtype=np.float32)
 
-            preferences[f"actors{sign}"].update(actors)
-            preferences[f"directors{sign}"].update(directors)
-            preferences[f"keywords{sign}"].update(keywords)
+def parseListColumn(column: pandas.Series) -> np.ndarray:
+    """Pre-split a stringified list column into tuples.
+
+    Each distinct cell value is parsed only once (via `normalize`) and
+    then broadcast back to every row holding it, so repeated values
+    such as common genre combinations cost a single parse.
+
+    Args:
+        column: Series of stringified lists, list-likes or missing values.
+
+    Returns:
+        An object array holding one tuple of strings per row; missing
+        values become an empty tuple.
+    """
+    if isinstance(column.dtype, pandas.CategoricalDtype):
+        codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+    else:
+        hashable = column.map(lambda v: v if isinstance(v, str) or not hasattr(v, "__iter__") else tuple(v))
+        codes, uniques = pandas.factorize(hashable)
+    parsed = np.empty(len(uniques) + 1, dtype=object)
+    for i, value in enumerate(uniques):
+        parsed[i] = tuple(normalize(value) or ())
+    parsed[-1] = () #code -1 marks missing values
+    return parsed[codes]
+
+class ListColumn:
+    """A list-valued column stored as CSR arrays.
+
+    Row `i` holds the items `vocabulary[ids[offsets[i]:offsets[i + 1]]]`.
+    The three arrays are plain NumPy arrays, so a column can be saved to
+    `.npy` files and memory-mapped back without any parsing.
+
+    Attributes:
+        vocabulary: Array of distinct item strings, indexed by id.
+        offsets: int64 array of length rows + 1 delimiting each row.
+        ids: int32 array of item ids, row after row.
+    """
+
+    def __init__(self, vocabulary: np.ndarray, offsets: np.ndarray, ids: np.ndarray):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.ids = ids
+        self.idOf = None
+        self.postingOffsets = None
+        self.postingMovies = None
+
+    @classmethod
+    def fromLists(cls, lists) -> "ListColumn":
+        """Build a column from a sequence of tuples (as returned by `parseListColumn`).
+
+        Ids are assigned in sorted order of the item strings.
+        """
+        vocabulary = sorted({item for items in lists for item in items})
+        idOf = {item: i for i, item in enumerate(vocabulary)}
+        lengths = np.fromiter((len(items) for items in lists), dtype=np.int64, count=len(lists))
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.fromiter((idOf[item] for items in lists for item in items), dtype=np.int32, count=int(offsets[-1]))
+        return cls(np.array(vocabulary, dtype=object), offsets, ids)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> tuple:
+        return tuple(self.vocabulary[self.ids[self.offsets[index]:self.offsets[index + 1]]].tolist())
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def lengths(self) -> np.ndarray:
+        """Return the number of items in each row."""
+        return np.diff(self.offsets)
+
+    def rows(self) -> np.ndarray:
+        """Return the row index of every entry of `ids`."""
+        return np.repeat(np.arange(len(self)), self.lengths())
+
+    def lookup(self, names) -> np.ndarray:
+        """Map item names to their ids.
+
+        Names that do not occur in the column are dropped, since they can
+        never match a movie.
+
+        Args:
+            names: Iterable of item strings (e.g. liked directors).
+
+        Returns:
+            A sorted int32 array of distinct ids.
+        """
+        if self.idOf is None:
+            self.idOf = {name: i for i, name in enumerate(self.vocabulary.tolist())}
+        return np.unique(np.array([self.idOf[name] for name in names or [] if name in self.idOf], dtype=np.int32))
+
+    def entries(self, movies) -> tuple:
+        """Gather the items of several rows in one indexed take.
+
+        Args:
+            movies: Array of row indices.
+
+        Returns:
+            A tuple (positions, ids) where `positions[j]` is the position in
+            `movies` of the row that item `ids[j]` belongs to.
+        """
+        movies = np.asarray(movies, dtype=np.intp)
+        starts = self.offsets[movies]
+        lengths = self.offsets[movies + 1] - starts
+        positions = np.repeat(np.arange(len(movies)), lengths)
+        firstEntry = np.cumsum(lengths) - lengths
+        return positions, self.ids[starts[positions] + np.arange(len(positions)) - firstEntry[positions]]
+
+    def matchCounts(self, termIds: np.ndarray, movies=None) -> np.ndarray:
+        """Count, for each row, how many of its items are in `termIds`.
+
+        Items listed twice in a row count twice, like the list-based
+        matching of `eval.calculatePList`.
+
+        Args:
+            termIds: Array of item ids to match (see `lookup`).
+            movies: Optional array of row indices; all rows if None.
+
+        Returns:
+            An int64 array with one count per row (or per entry of `movies`).
+        """
+        member = np.zeros(len(self.vocabulary), dtype=bool)
+        member[termIds] = True
+        if movies is None:
+            positions, ids, size = self.rows(), self.ids, len(self)
+        else:
+            (positions, ids), size = self.entries(movies), len(movies)
+        return np.bincount(positions, weights=member[ids], minlength=size).astype(np.int64)
+
+    def postings(self) -> tuple:
+        """Return the inverted index of the column, building it on first use.
+
+        The index is the transpose of the CSR arrays: the movies holding
+        item `i` are `postingMovies[postingOffsets[i]:postingOffsets[i + 1]]`,
+        in ascending order.
+
+        Returns:
+            A tuple (postingOffsets, postingMovies).
+        """
+        if self.postingOffsets is None:
+            order = np.argsort(self.ids, kind="stable") #stable keeps each posting list sorted by movie
+            postingOffsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.ids, minlength=len(self.vocabulary)), out=postingOffsets[1:])
+            self.postingMovies = self.rows()[order].astype(np.int32)
+            self.postingOffsets = postingOffsets
+        return self.postingOffsets, self.postingMovies
+
+    def moviesWith(self, termIds: np.ndarray) -> np.ndarray:
+        """Return the movies holding any of the given items (union of their postings).
+
+        Args:
+            termIds: Array of item ids (see `lookup`).
+
+        Returns:
+            A sorted array of distinct movie indices.
+        """
+        postingOffsets, postingMovies = self.postings()
+        lists = [postingMovies[postingOffsets[term]:postingOffsets[term + 1]] for term in termIds]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(lists))
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.ids.nbytes + self.vocabulary.nbytes
+
+def buildGenreVocabulary(genres: ListColumn) -> dict:
+    """Assign a bit position to every genre, starting with `GENRES`.
+
+    Args:
+        genres: The genre column.
+
+    Returns:
+        A dict mapping genre name to bit position.
+
+    Raises:
+        ValueError: If there are more genres than bits in a uint64 mask.
+    """
+    vocabulary = {genre: bit for bit, genre in enumerate(GENRES)}
+    extra = sorted(set(genres.vocabulary.tolist()) - vocabulary.keys())
+    for genre in extra:
+        vocabulary[genre] = len(vocabulary)
+    if len(vocabulary) > 64:
+        raise ValueError(f"Too many genres for a 64-bit mask: {len(vocabulary)}")
+    return vocabulary
+
+def genreMasks(genres: ListColumn, vocabulary: dict) -> np.ndarray:
+    """Encode each movie's genres as a uint64 bitmask.
+
+    Args:
+        genres: The genre column.
+        vocabulary: Mapping from genre name to bit position.
+
+    Returns:
+        A uint64 array with bit `vocabulary[g]` set for every genre g of the movie.
+    """
+    bitOfId = np.array([1 << vocabulary[genre] for genre in genres.vocabulary.tolist()], dtype=np.uint64)
+    masks = np.zeros(len(genres), dtype=np.uint64)
+    np.bitwise_or.at(masks, genres.rows(), bitOfId[genres.ids])
+    return masks
+
+# Layout version of the bundle written by `MovieFeatureStore.save`
+BUNDLE_VERSION = 1
+LIST_COLUMNS = ["genres", "directors", "stars", "keywords"]
+NUMERIC_ARRAYS = ["year", "minutes", "rating", "genreMask", "genreCount", "genreDuplicates"]
+
+class MovieFeatureStore:
+    """Typed, pre-parsed copy of the columns used for scoring.
+
+    The store is built once when the catalog is loaded so that the
+    fitness functions can read a movie's features by integer position
+    without going through pandas or re-parsing strings. It can also be
+    saved as a bundle of `.npy` files (see `convert.py`) and
+    memory-mapped back with `fromBundle`.
+
+    Attributes:
+        size: Number of movies in the catalog.
+        year: int16 release years (0 if unknown).
+        minutes: int16 durations in minutes (0 if unknown).
+        rating: float32 ratings (0 if unknown).
+        genres, directors, stars, keywords: `ListColumn`s.
+        genreVocabulary: Mapping from genre name to bit position.
+        genreMask: uint64 genre bitmask of each movie.
+        genreCount: Number of genres listed for each movie.
+        genreDuplicates: Sorted indices of the (rare) movies listing a
+            genre more than once, which a bitmask cannot represent.
+        yearOrder: Movie indices sorted by year, built by `yearIndex` on first use.
+    """
 
-    return {key: list(values) for key, values in preferences.items()}
\ No newline at end of file
+    def __init__(self, frame: pandas.DataFrame):
+        self.size = len(frame)
+        self.year = parseYearColumn(frame["release_date"])
+        self.minutes = parseDurationColumn(frame["duration"])
+        self.rating = parseRatingColumn(frame["rating"])
+        for name in LIST_COLUMNS:
+            setattr(self, name, ListColumn.fromLists(parseListColumn(frame[name])))
+
+        self.genreVocabulary = buildGenreVocabulary(self.genres)
+        self.genreMask = genreMasks(self.genres, self.genreVocabulary)
+        self.genreCount = self.genres.lengths().astype(np.int16)
+        self.genreDuplicates = np.flatnonzero(popcount(self.genreMask) != self.genreCount)
+        self.yearOrder = None
+
+    def save(self, path: str, extra: dict = None):
+        """Write the store as a bundle directory of `.npy` arrays plus `manifest.json`.
+
+        Args:
+            path: Output directory (created if needed).
+            extra: Optional dict of additional manifest entries (e.g. source
+                file information and validation results).
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in NUMERIC_ARRAYS}
+        for name in LIST_COLUMNS:
+            column = getattr(self, name)
+            arrays[f"{name}_vocabulary"] = np.array(column.vocabulary.tolist(), dtype=str)
+            arrays[f"{name}_offsets"] = column.offsets
+            arrays[f"{name}_ids"] = column.ids
+
+        manifest = {
+            "format": "moviebuddy-bundle",
+            "version": BUNDLE_VERSION,
+            "rows": self.size,
+            "genreVocabulary": sorted(self.genreVocabulary, key=self.genreVocabulary.get),
+            "arrays": {}
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+            manifest["arrays"][name] = {"file": f"{name}.npy", "dtype": str(array.dtype), "shape": list(array.shape)}
+        manifest.update(extra or {})
+
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def fromBundle(cls, path: str) -> "MovieFeatureStore":
+        """Open a bundle written by `save`, memory-mapping every array.
+
+        Args:
+            path: Bundle directory.
+
+        Returns:
+            A MovieFeatureStore backed by read-only memory maps.
+
+        Raises:
+            ValueError: If the manifest is missing fields or has another version.
+        """
+        manifest = readBundleManifest(path)
+        if manifest.get("format") != "moviebuddy-bundle" or manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle in {path}: {manifest.get('format')} v{manifest.get('version')}")
+
+        def load(name):
+            return np.load(os.path.join(path, manifest["arrays"][name]["file"]), mmap_mode="r")
+
+        self = cls.__new__(cls)
+        self.size = manifest["rows"]
+        for name in NUMERIC_ARRAYS:
+            setattr(self, name, load(name))
+        for name in LIST_COLUMNS:
+            setattr(self, name, ListColumn(load(f"{name}_vocabulary"), load(f"{name}_offsets"), load(f"{name}_ids")))
+        self.genreVocabulary = {genre: bit for bit, genre in enumerate(manifest["genreVocabulary"])}
+        self.yearOrder = None
+        return self
+
+    def compileGenreMask(self, genres: list) -> np.uint64:
+        """Compile a user's genre list into a bitmask.
+
+        Genres missing from the catalog vocabulary have no bit, so they
+        can never match (but still count towards the list length).
+
+        Args:
+            genres: List of genre names, e.g. `userInput["Generi"]`.
+
+        Returns:
+            The uint64 bitmask of the known genres.
+        """
+        mask = np.uint64(0)
+        for genre in genres or []:
+            if genre in self.genreVocabulary:
+                mask |= np.uint64(1) << np.uint64(self.genreVocabulary[genre])
+        return mask
+
+    def yearIndex(self) -> tuple:
+        """Return the movies sorted by release year, building the index on first use.
+
+        Returns:
+            A tuple (sortedYears, yearOrder) where `yearOrder` lists the
+            movie indices by ascending year and `sortedYears` their years.
+        """
+        if self.yearOrder is None:
+            self.yearOrder = np.argsort(self.year, kind="stable").astype(np.int32)
+        return self.year[self.yearOrder], self.yearOrder
+
+    def moviesInPeriod(self, period: range) -> np.ndarray:
+        """Return the sorted indices of the movies released in `period`.
+
+        Args:
+            period: Range of years, e.g. `userInput["Periodo"]`.
+        """
+        sortedYears, yearOrder = self.yearIndex()
+        start, stop = np.searchsorted(sortedYears, [period.start, period.stop])
+        return np.sort(yearOrder[start:stop])
+
+    def candidatePool(self, period: range, genres: list) -> np.ndarray:
+        """Return the sorted indices of the movies released in `period` that share a genre with `genres`.
+
+        An empty genre list (or one with no known genre) keeps every movie of the period.
+
+        Args:
+            period: Range of years, e.g. `userInput["Periodo"]`.
+            genres: List of genre names, e.g. `userInput["Generi"]`.
+        """
+        movies = self.moviesInPeriod(period)
+        mask = self.compileGenreMask(genres)
+        if mask:
+            movies = movies[(self.genreMask[movies] & mask) != 0]
+        return movies
@@ -1,3 +1,5 @@
+import numpy as np
+
 maxPublicationDistance = 105
 lengthRanges = range(40, 245, 5)
 
@@ -115,4 +117,72 @@ def calculatePL( movielength : int, selectedBracket : int, weightLength : int )
     lengthRange = getLengthRange(movielength)
     d = (abs(selectedBracket - lengthRange)) / 5
     PL = d/dMax*weightLength
-    return PL
\ No newline at end of file
+    return PL
+
+
+#Array counterparts of the functions above. Each takes a whole column of
+#movie values and returns one penalty per movie, matching the scalar version.
+def calculatePPArray(movieReleaseYears : np.ndarray, selectedPeriod : range, weightPublication : float) -> np.ndarray:
+    """Vectorized `calculatePP` over an array of release years (0 = unknown)."""
+    years = np.asarray(movieReleaseYears, dtype=np.int64)
+    inPeriod = (years >= selectedPeriod.start) & (years < selectedPeriod.stop)
+    SP = np.where(inPeriod, 0, np.maximum(selectedPeriod.start - years, years - selectedPeriod.stop))
+    return np.where(years == 0, weightPublication, SP*weightPublication)
+
+def calculatePLArray(movieLengths : np.ndarray, selectedBracket : int, weightLength : float) -> np.ndarray:
+    """Vectorized `calculatePL` over an array of lengths in minutes (0 = unknown)."""
+    lengths = np.asarray(movieLengths, dtype=np.int64)
+    remainder = lengths % 5
+    lengthRange = np.where(remainder <= 2, lengths - remainder, lengths + 5 - remainder)
+    d = np.abs(selectedBracket - lengthRange) / 5
+    return np.where(lengths == 0, weightLength, d/dMax*weightLength)
+
+def calculatePSArray(movieScores : np.ndarray, weightScore : float) -> np.ndarray:
+    """Vectorized `calculatePS` over an array of ratings."""
+    return weightScore - (np.asarray(movieScores, dtype=np.float64)/scoreMax*weightScore)
+
+#lookup table of set bits per byte, used when numpy has no bitwise_count
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(values : np.ndarray) -> np.ndarray:
+    """Count the set bits of each element of a uint64 array."""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+def calculatePListMask(movieMasks : np.ndarray, movieCounts : np.ndarray, inputMask : np.uint64, inputLength : int, weightList : float) -> np.ndarray:
+    """Bitmask version of `calculatePList(normalize=True)` over many movies.
+
+    Matching items are counted with AND + popcount, which gives the same
+    result as the list version as long as a movie lists each item once.
+
+    Args:
+        movieMasks: uint64 bitmask of each movie's items.
+        movieCounts: Number of items listed for each movie.
+        inputMask: Bitmask of the user's list.
+        inputLength: Length of the user's list.
+        weightList: Weight to scale the result.
+
+    Returns:
+        A float array with one penalty per movie.
+    """
+    matchingItems = popcount(np.bitwise_and(movieMasks, inputMask)).astype(np.int64)
+    return calculatePListCounts(matchingItems, movieCounts, inputLength, weightList)
+
+def calculatePListCounts(matchingItems : np.ndarray, movieCounts : np.ndarray, inputLength : int, weightList : float) -> np.ndarray:
+    """`calculatePList(normalize=True)` from precomputed match counts.
+
+    Args:
+        matchingItems: Number of each movie's items found in the user's list.
+        movieCounts: Number of items listed for each movie.
+        inputLength: Length of the user's list.
+        weightList: Weight to scale the result.
+
+    Returns:
+        A float array with one penalty per movie.
+    """
+    counts = np.asarray(movieCounts)
+    if(not inputLength):
+        return np.where(counts == 0, weightList, 0.0)
+    return np.where(counts == 0, weightList, (inputLength - np.asarray(matchingItems))*weightList/inputLength)
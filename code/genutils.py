@@ -1,31 +1,44 @@
 import datareader as dr
 import random
+import heapq
+import multiprocessing
+import contextlib
+import functools
+import time
 import numpy as np
 from deap import tools, creator, base
 from datareader import *
-import eval
 from eval import calculatePList, calculatePL, calculatePP, calculatePS, maxPublicationDistance
-from datareader import extractRating, extractDuration, extractList, extractYear, getMovieParameterList
+from eval import calculatePPArray, calculatePLArray, calculatePSArray, calculatePListMask
+from penaltycache import PenaltyCache
 
 weightPublication = 10/maxPublicationDistance
 weightLength = 0.5
 weightScore = 0.5
 weightGenres = 2.7
 
-DURATION_INDEX = 0
-RATING_INDEX = 1
-RELEASEDATE_INDEX = 2
-GENRES_INDEX = 3
 IND_SIZE = 5
+MAX_STAGNATION = 2 # generations without improvement (after min_iter) before stopping
+MIN_POOL_SIZE = 100 # smaller candidate pools fall back to the whole catalog
 
-def mutRandomReset(individual, low=1, high=63248, indpb=0.05):
+# Full-catalog PP / PL / PG / PS vectors, shared by every run in the process
+penaltyCache = PenaltyCache()
+
+def randomMovie(low=0, high=63248, pool=None) -> int:
+    """Draw a random movie index, uniformly from `pool` if given, otherwise from [low, high]."""
+    if pool is not None:
+        return int(pool[random.randrange(len(pool))])
+    return random.randint(low, high)
+
+def mutRandomReset(individual, low=1, high=63248, indpb=0.05, pool=None):
     """
     Random resetting mutation for list-based integer individuals.
-    Each gene has an independent probability indpb of being reset.
+    Each gene has an independent probability indpb of being reset,
+    to a movie of `pool` if given, otherwise to an index in [low, high].
     """
     for i in range(len(individual)):
         if random.random() < indpb:
-            individual[i] = random.randint(low, high)
+            individual[i] = randomMovie(low, high, pool)
     return (individual,)
 
 def cxUniformInts(ind1, ind2, indpb=0.1):
@@ -38,13 +51,63 @@ def cxUniformInts(ind1, ind2, indpb=0.1):
             ind1[i], ind2[i] = ind2[i], ind1[i]
     return ind1, ind2
 
+def rankProbabilities(tournsize=3, p=0.7) -> np.ndarray:
+    """Return the normalized winning probability of each tournament rank, p*(1-p)^i."""
+    probs = p * (1 - p) ** np.arange(tournsize)
+    return probs / probs.sum()
+
+def sampleAspirants(n : int, k : int, tournsize : int, rng : np.random.Generator) -> np.ndarray:
+    """Draw k tournaments of `tournsize` distinct indices in [0, n) at once.
+
+    Column j is drawn uniformly among the n - j indices not yet in the row
+    and shifted past the previous picks, so every row is a uniform sample
+    without replacement, like `random.sample`.
+
+    Returns:
+        An int array of shape (k, tournsize).
+    """
+    aspirants = np.empty((k, tournsize), dtype=np.intp)
+    for j in range(tournsize):
+        column = rng.integers(0, n - j, size=k)
+        for previous in np.sort(aspirants[:, :j], axis=1).T:
+            column += column >= previous
+        aspirants[:, j] = column
+    return aspirants
+
+def selProbabilisticTournamentIndices(fitness : np.ndarray, k : int, rng : np.random.Generator, tournsize=3, p=0.7, minimize=True) -> np.ndarray:
+    """Probabilistic tournament selection on a fitness vector, all k tournaments at once.
+
+    Aspirants are drawn in a (k x tournsize) array, ranked with `argsort`
+    along the rows and each winner is picked from the rank distribution
+    of `rankProbabilities`.
+
+    Args:
+        fitness: Fitness value of each individual.
+        k: Number of individuals to select.
+        rng: NumPy Generator.
+        tournsize: Number of aspirants per tournament.
+        p: Base probability for top-ranked aspirant.
+        minimize: True if lower fitness is better.
+
+    Returns:
+        An array of k selected indices into `fitness`.
+    """
+    fitness = np.asarray(fitness)
+    aspirants = sampleAspirants(len(fitness), k, tournsize, rng)
+    keys = fitness[aspirants] if minimize else -fitness[aspirants]
+    ranked = np.take_along_axis(aspirants, np.argsort(keys, axis=1, kind="stable"), axis=1)
+    ranks = rng.choice(tournsize, size=k, p=rankProbabilities(tournsize, p))
+    return ranked[np.arange(k), ranks]
+
 def selProbabilisticTournament(population, k, tournsize=3, p=0.7):
     """Select k individuals using probabilistic tournament selection.
 
     For each of k selections, a tournament of `tournsize` individuals is
     sampled. Those aspirants are ranked by fitness and a winner is
     chosen probabilistically based on geometric-like probabilities
-    controlled by `p` (the top-ranked has probability ~p).
+    controlled by `p` (the top-ranked has probability ~p). The k
+    tournaments are run together by `selProbabilisticTournamentIndices`,
+    seeded from the `random` module so `random.seed` keeps runs reproducible.
 
     Args:
         population: Sequence of individuals (with `.fitness.values`).
@@ -56,37 +119,17 @@ def selProbabilisticTournament(population, k, tournsize=3, p=0.7):
         A list of selected individuals.
     """
     minimize = all(w < 0 for w in population[0].fitness.weights) #if individuals have negative weights, sort by descending order so lower fitness is better
-    chosen = []
-    for _ in range(k):
-        
-
-        # Draw tournament contenders
-        aspirants = random.sample(population, tournsize)
-        
-        # Sort by fitness based on minimize
-        aspirants.sort(key=lambda ind: ind.fitness.values, reverse = not minimize)
-
-        # Probabilities based on rank
-        probs = []
-        for i in range(tournsize):
-            probs.append(p * ((1 - p) ** i))
-        
-        # Normalize
-        total = sum(probs)
-        probs = [x / total for x in probs]
-
-        # Choose one individual proportional to probability
-        winner = random.choices(aspirants, weights=probs, k=1)[0]
-        chosen.append(winner)
-    
-    return chosen
+    fitness = np.fromiter((ind.fitness.values[0] for ind in population), dtype=np.float64, count=len(population))
+    rng = np.random.default_rng(random.getrandbits(64))
+    return [population[i] for i in selProbabilisticTournamentIndices(fitness, k, rng, tournsize, p, minimize)]
 
 def evaluate(individual, userInput : dict) -> float:
     """Compute the aggregate fitness score for an individual.
 
     Each individual is a list of movie indices. For each movie this
-    function extracts parameters (duration, rating, release year, genres)
-    and computes the component penalties using functions from `eval`.
+    function reads the pre-parsed parameters (duration, rating, release
+    year, genres) from the `datareader` feature store and computes the component
+    penalties using functions from `eval`.
 
     Args:
         individual: Iterable of movie indices.
@@ -95,13 +138,13 @@ def evaluate(individual, userInput : dict) -> float:
     Returns:
         A single-element tuple containing the total score (lower is better).
     """
+    store = dr.getStore()
     totalScore = 0.0
     for  movie in individual:
-        movieParameterList = getMovieParameterList(movie)
-        movieReleaseYear = extractYear(movieParameterList[RELEASEDATE_INDEX])
-        movieDuration = extractDuration(movieParameterList[DURATION_INDEX])
-        movieGenres = extractList(movieParameterList[GENRES_INDEX])
-        movieRating =  extractRating(movieParameterList[RATING_INDEX].item())
+        movieReleaseYear = int(store.year[movie])
+        movieDuration = int(store.minutes[movie])
+        movieGenres = store.genres[movie]
+        movieRating = float(store.rating[movie])
 
         PP = calculatePP(movieReleaseYear, userInput.get("Periodo"), weightPublication) 
         PL = calculatePL(movieDuration, userInput.get("Lunghezza"), weightLength)
@@ -112,14 +155,289 @@ def evaluate(individual, userInput : dict) -> float:
         totalScore += P
     return totalScore, 
 
+def genrePenalties(movies : np.ndarray, inputGenres : list, weightList : float = weightGenres) -> np.ndarray:
+    """Compute the genre penalty of many movies from their genre bitmasks.
 
+    Matches `calculatePList(normalize=True)` exactly; the few movies that
+    list a genre twice (see `MovieFeatureStore.genreDuplicates`) are
+    scored with the list-based function.
 
+    Args:
+        movies: Array of movie indices.
+        inputGenres: The user's genre list.
+        weightList: Weight to scale the result.
 
+    Returns:
+        A float array with one penalty per entry of `movies`.
+    """
+    store = dr.getStore()
+    PG = calculatePListMask(store.genreMask[movies], store.genreCount[movies],
+                            store.compileGenreMask(inputGenres), len(inputGenres or []), weightList)
+    if len(store.genreDuplicates):
+        for position in np.flatnonzero(np.isin(movies, store.genreDuplicates)):
+            PG[position] = calculatePList(store.genres[movies[position]], inputGenres, weightList)
+    return PG
+
+def componentPenalties(userInput : dict, cache : PenaltyCache = None) -> tuple:
+    """Return the full-catalog PP, PL, PG and PS penalty vectors.
+
+    Each vector is looked up in `cache` (the module `penaltyCache` by
+    default) under a key made of the one preference it depends on, its
+    weight and the catalog version, so only the components whose input changed since an
+    earlier query are recomputed.
 
+    Args:
+        userInput: Dict containing user preferences used by scoring functions.
+        cache: PenaltyCache to use.
+
+    Returns:
+        A tuple (PP, PL, PG, PS) of arrays indexed by movie.
+    """
+    if cache is None:
+        cache = penaltyCache
+    store = dr.getStore()
+    period = userInput.get("Periodo")
+    length = userInput.get("Lunghezza")
+    genres = userInput.get("Generi")
+    PP = cache.get(("PP", dr.catalogVersion, period.start, period.stop, weightPublication),
+                   lambda: calculatePPArray(store.year, period, weightPublication))
+    PL = cache.get(("PL", dr.catalogVersion, length, weightLength),
+                   lambda: calculatePLArray(store.minutes, length, weightLength))
+    PG = cache.get(("PG", dr.catalogVersion, tuple(sorted(genres or [])), weightGenres),
+                   lambda: genrePenalties(np.arange(store.size), genres, weightGenres))
+    PS = cache.get(("PS", dr.catalogVersion, weightScore),
+                   lambda: calculatePSArray(store.rating, weightScore))
+    return PP, PL, PG, PS
+
+def catalogPenalties(userInput : dict, cache : PenaltyCache = None) -> np.ndarray:
+    """Return the per-movie penalty (PP + PL + PG + PS) for the whole catalog.
+
+    Args:
+        userInput: Dict containing user preferences used by scoring functions.
+        cache: PenaltyCache holding the component vectors.
+
+    Returns:
+        A float64 array indexed by movie.
+    """
+    PP, PL, PG, PS = componentPenalties(userInput, cache)
+    return PP.astype(np.float64) + PL + PG + PS
 
+def moviePenalties(movies : np.ndarray, userInput : dict) -> np.ndarray:
+    """Compute the per-movie penalty (PP + PL + PG + PS) for many movies.
 
+    Array version of the body of `evaluate`, read from the cached
+    full-catalog component vectors. If the cache cannot hold the four
+    vectors of this catalog together, only the requested movies are
+    scored instead of rebuilding catalog-wide vectors on every call.
 
-def geneticAlgorithm(userInput:dict, toolbox, pop_size=100, cxpb=0.2, mutpb=0.02, min_iter = 5, max_iter = 15):
+    Args:
+        movies: Array of movie indices.
+        userInput: Dict containing user preferences used by scoring functions.
+
+    Returns:
+        A float array with one penalty per entry of `movies`.
+    """
+    store = dr.getStore()
+    if not penaltyCache.fits(store.size, 4):
+        PP = calculatePPArray(store.year[movies], userInput.get("Periodo"), weightPublication)
+        PL = calculatePLArray(store.minutes[movies], userInput.get("Lunghezza"), weightLength)
+        PG = genrePenalties(movies, userInput.get("Generi"), weightGenres)
+        PS = calculatePSArray(store.rating[movies], weightScore)
+        return PP + PL + PG + PS
+
+    PP, PL, PG, PS = componentPenalties(userInput)
+    return PP[movies].astype(np.float64) + PL[movies] + PG[movies] + PS[movies]
+
+def evaluatePopulation(population, userInput : dict) -> np.ndarray:
+    """Compute the fitness of a whole population at once.
+
+    The population is turned into a (pop_size x IND_SIZE) index array,
+    the penalty of every distinct movie in it is computed once with
+    `moviePenalties` and the rows are summed. Scores match `evaluate`.
+
+    Args:
+        population: Sequence of individuals (lists of movie indices) or a 2D index array.
+        userInput: Dict containing user preferences used by scoring functions.
+
+    Returns:
+        A float array with the total score of each individual (lower is better).
+    """
+    indices = np.asarray(population, dtype=np.intp).reshape(len(population), -1)
+    movies, inverse = np.unique(indices.ravel(), return_inverse=True)
+    penalties = moviePenalties(movies, userInput)[inverse].reshape(indices.shape)
+
+    # Add the movies column by column, in the same order as `evaluate`
+    totalScores = np.zeros(len(indices))
+    for column in range(indices.shape[1]):
+        totalScores += penalties[:, column]
+    return totalScores
+
+def assignFitnesses(individuals, toolbox, userInput : dict):
+    """Evaluate `individuals` and store the results in their fitness.
+
+    Uses the toolbox's batch evaluator (`evaluatePopulation`) when it is
+    registered, falling back to calling `evaluate` on each individual.
+
+    Args:
+        individuals: List of individuals to evaluate.
+        toolbox: DEAP toolbox with `evaluate` and optionally `evaluatePopulation`.
+        userInput: Dict containing user preferences used by scoring functions.
+    """
+    if not individuals:
+        return
+    if hasattr(toolbox, "evaluatePopulation"):
+        fitnesses = [(float(fit),) for fit in toolbox.evaluatePopulation(individuals, userInput)]
+    else:
+        fitnesses = [toolbox.evaluate(ind, userInput) for ind in individuals]
+    for ind, fit in zip(individuals, fitnesses):
+        ind.fitness.values = fit
+
+def exactBest(userInput : dict, pop_size=100) -> list:
+    """Return the `pop_size` best individuals without running the GA.
+
+    The phase-one objective is a plain sum of per-movie penalties, so the
+    optimal individual is made of the IND_SIZE lowest-penalty movies.
+    More generally, the `pop_size` best individuals (sets of distinct
+    movies) only use the IND_SIZE + pop_size - 1 best movies, which are
+    found with `argpartition` and then enumerated best-first.
+
+    Args:
+        userInput: Dict containing user preferences used by scoring functions.
+        pop_size: Number of individuals to return.
+
+    Returns:
+        A list of individuals sorted best first, like `tools.selBest`.
+
+    Raises:
+        ValueError: If the catalog has fewer than IND_SIZE movies.
+    """
+    penalties = catalogPenalties(userInput)
+    if len(penalties) < IND_SIZE:
+        raise ValueError(f"The catalog needs at least {IND_SIZE} movies")
+
+    poolSize = min(len(penalties), IND_SIZE + pop_size - 1)
+    candidates = np.argpartition(penalties, poolSize - 1)[:poolSize]
+    candidates = candidates[np.argsort(penalties[candidates], kind="stable")]
+    candidatePenalties = penalties[candidates].tolist()
+
+    # Each state is a sorted tuple of positions in `candidates`. Moving one
+    # position forward never lowers the total, so popping states from a heap
+    # yields the subsets in order of increasing score.
+    start = tuple(range(IND_SIZE))
+    heap = [(sum(candidatePenalties[i] for i in start), start)]
+    seen = {start}
+    best = []
+    while heap and len(best) < pop_size:
+        total, positions = heapq.heappop(heap)
+        best.append(positions)
+        for i in range(IND_SIZE):
+            nextPosition = positions[i] + 1
+            if nextPosition >= poolSize or (i + 1 < IND_SIZE and nextPosition == positions[i + 1]):
+                continue
+            successor = positions[:i] + (nextPosition,) + positions[i + 1:]
+            if successor not in seen:
+                seen.add(successor)
+                heapq.heappush(heap, (total - candidatePenalties[positions[i]] + candidatePenalties[nextPosition], successor))
+
+    individuals = [creator.Individual(int(candidates[i]) for i in positions) for positions in best]
+    for ind, fit in zip(individuals, evaluatePopulation(individuals, userInput)):
+        ind.fitness.values = (float(fit),)
+    return tools.selBest(individuals, len(individuals))
+
+def evolveGeneration(population, toolbox, userInput : dict, cxpb : float, mutpb : float, recorder=None) -> list:
+    """Produce the next generation: selection, cloning, crossover, mutation and evaluation.
+
+    Args:
+        population: Current list of evaluated individuals.
+        toolbox: DEAP toolbox (see `geneticAlgorithm`).
+        userInput: Dict with user preference parameters used by the evaluator.
+        cxpb: Crossover probability applied per pair of individuals.
+        mutpb: Mutation probability applied per individual.
+        recorder: Optional `telemetry.GenerationRecorder` timing each step.
+
+    Returns:
+        The new list of evaluated individuals.
+    """
+    phase = recorder.phase if recorder else lambda name: contextlib.nullcontext()
+
+    # Selection
+    with phase("select"):
+        offspring = toolbox.select(population, len(population))
+
+    # Clone the offspring (DEAP convention)
+    with phase("clone"):
+        offspring = list(map(toolbox.clone, offspring))
+
+    # Apply crossover
+    # zip does pairwise iteration over the offspring list and crossover is applied to each pair
+    with phase("mate"):
+        for child1, child2 in zip(offspring[::2], offspring[1::2]): #offspring[::2] gives even indexed, offspring[1::2] gives odd indexed
+            if random.random() < cxpb:
+                toolbox.mate(child1, child2, indpb = 0.5)
+                del child1.fitness.values
+                del child2.fitness.values
+
+    # Apply mutation
+    with phase("mutate"):
+        for mutant in offspring:
+            if random.random() < mutpb:
+                toolbox.mutate(mutant)
+                del mutant.fitness.values
+
+    # Re-evaluate individuals with invalid fitness in a single batch
+    with phase("evaluate"):
+        invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
+        assignFitnesses(invalid_ind, toolbox, userInput)
+    if recorder:
+        recorder.count_evaluations(len(invalid_ind))
+    return offspring
+
+def stopReason(deadline=None, cancel=None) -> str:
+    """Return why an anytime run should stop now ("cancelled" or "deadline"), or None to go on.
+
+    Args:
+        deadline: Optional `time.monotonic()` timestamp after which the run stops.
+        cancel: Optional `threading.Event` set to stop the run.
+    """
+    if cancel is not None and cancel.is_set():
+        return "cancelled"
+    if deadline is not None and time.monotonic() >= deadline:
+        return "deadline"
+    return None
+
+def publishProgress(progress, gen : int, max_iter : int, best, stagnation : int, started : float, deadline=None):
+    """Put a progress message of the current generation on a thread-safe queue.
+
+    The message is a dict with the generation `gen`, `max_iter`, the
+    best-so-far `best` gene list and its `fitness`, the `stagnation`
+    counter and `fraction`, the share of the generation or time budget
+    already used (whichever is larger).
+
+    Args:
+        progress: A `queue.Queue` (or None to skip).
+        gen: Current generation (0 for the initial population).
+        max_iter: Generation limit of the run.
+        best: Best individual so far (a list of movie indices with a fitness).
+        stagnation: Current value of the stagnation counter.
+        started: `time.monotonic()` at the start of the run.
+        deadline: Optional `time.monotonic()` deadline of the run.
+    """
+    if progress is None:
+        return
+    fraction = gen / max_iter if max_iter else 1.0
+    if deadline is not None and deadline > started:
+        fraction = max(fraction, (time.monotonic() - started) / (deadline - started))
+    progress.put_nowait({
+        "gen": gen,
+        "max_iter": max_iter,
+        "best": list(best),
+        "fitness": best.fitness.values[0],
+        "stagnation": stagnation,
+        "fraction": min(fraction, 1.0)
+    })
+
+def geneticAlgorithm(userInput:dict, toolbox, pop_size=100, cxpb=0.2, mutpb=0.02, min_iter = 5, max_iter = 15, engine="ga", stats=None, recorder=None,
+                     progress=None, deadline=None, cancel=None, warm_start=None):
     """Run a genetic algorithm to optimize movie selections.
 
     The function uses the provided DEAP `toolbox` to create an initial
@@ -129,35 +447,83 @@ def geneticAlgorithm(userInput:dict, toolbox, pop_size=100, cxpb=0.2, mutpb=0.02
 
     Args:
         userInput: Dict with user preference parameters used by the evaluator.
-        toolbox: DEAP toolbox configured with `population`, `evaluate`, `select`, `mate`, `mutate`.
+        toolbox: DEAP toolbox configured with `population`, `evaluate`, `select`, `mate`, `mutate`
+            and optionally `evaluatePopulation` for batch evaluation.
         pop_size: Population size.
         cxpb: Crossover probability applied per pair of individuals.
         mutpb: Mutation probability applied per individual.
         min_iter: Minimum number of generations to run before allowing early stop.
         max_iter: Maximum number of generations to run.
+        engine: "ga" to evolve a population, "array" to run the same
+            algorithm on an int32 gene matrix (`arrayga.arrayGeneticAlgorithm`),
+            or "exact" to return the provably optimal individuals from
+            `exactBest`. The array and exact engines rely on the built-in
+            objective and only use the toolbox's candidate `pool` (array
+            engine), so keep "ga" for custom objectives.
+        stats: Optional dict that receives run statistics
+            (`generations`: number of generations run, `stopped`: the
+            `stopReason` of an interrupted run, or None).
+        recorder: Optional `telemetry.GenerationRecorder` that records
+            per-generation fitness, evaluation counts, step timings and
+            penalty cache hits.
+        progress: Optional `queue.Queue` receiving a `publishProgress`
+            message after every generation.
+        deadline: Optional `time.monotonic()` timestamp. The run stops at
+            the first generation boundary past it and returns the current
+            population (`stats["stopped"]` is then "deadline").
+        cancel: Optional `threading.Event`; setting it stops the run the
+            same way (`stats["stopped"]` is then "cancelled").
+        warm_start: Optional `warmstart.SeedStore`. A `fraction` of the
+            initial population is taken from its seeds for `userInput`,
+            the rest is random.
 
     Returns:
         The selected best individuals as returned by `tools.selBest`.
     """
-
-    # Create population
-    population = toolbox.population(n=pop_size)
+    if stats is None:
+        stats = {}
+    if engine == "exact":
+        stats["generations"] = 0
+        return exactBest(userInput, pop_size)
+    seeds = warm_start.seeds(userInput, int(pop_size * warm_start.fraction)) if warm_start else []
+    if engine == "array":
+        from arrayga import arrayGeneticAlgorithm
+        return arrayGeneticAlgorithm(userInput, pop_size, cxpb, mutpb, min_iter, max_iter,
+                                     pool=getattr(toolbox, "pool", None), stats=stats, recorder=recorder,
+                                     progress=progress, deadline=deadline, cancel=cancel, seeds=seeds)
+    if engine != "ga":
+        raise ValueError(f"Unknown engine: {engine}")
+
+    started = time.monotonic()
+    if recorder:
+        recorder.start_run(max_iter, penaltyCache)
+        recorder.start_generation(0)
+
+    # Create population, starting from the warm-start seeds if any
+    population = [creator.Individual(genes) for genes in seeds] + toolbox.population(n=pop_size - len(seeds))
 
     # Evaluate initial population
-    fitnesses = list(map(lambda ind: toolbox.evaluate(ind, userInput), population))
-    for ind, fit in zip(population, fitnesses):
-        ind.fitness.values = fit
+    assignFitnesses(population, toolbox, userInput)
+    if recorder:
+        recorder.count_evaluations(len(population))
+        recorder.end_generation(population, 0)
+    publishProgress(progress, 0, max_iter, tools.selBest(population, 1)[0], 0, started, deadline)
 
     # Track best fitness and stagnation
     best_prev = min(ind.fitness.values[0] for ind in population)
     stagnation_counter = 0 # Initialize stagnation counter
-    MAX_STAGNATION = 2    
     
     gen = 0
 
     # The loop now stops if gen reaches max_iter OR stagnation_counter reaches MAX_STAGNATION
+    # (or early, with the current population, when the deadline passes or the run is cancelled)
     while gen < max_iter and stagnation_counter < MAX_STAGNATION:
+        stats["stopped"] = stopReason(deadline, cancel)
+        if stats["stopped"]:
+            break
         gen += 1
+        if recorder:
+            recorder.start_generation(gen)
         
         # Check stagnation and update best_prev after the mandatory minimum iterations
         if gen > min_iter:
@@ -171,52 +537,200 @@ def geneticAlgorithm(userInput:dict, toolbox, pop_size=100, cxpb=0.2, mutpb=0.02
                 # no improvement (equal or worse)
                 stagnation_counter += 1
         
-        # Selection
-        offspring = toolbox.select(population, len(population))
+        # Replace population 
+        population = evolveGeneration(population, toolbox, userInput, cxpb, mutpb, recorder)
+        if recorder:
+            recorder.end_generation(population, stagnation_counter)
+        publishProgress(progress, gen, max_iter, tools.selBest(population, 1)[0], stagnation_counter, started, deadline)
 
-        # Clone the offspring (DEAP convention)
-        offspring = list(map(toolbox.clone, offspring))
+    # Return Best movies 
+    print(gen)
+    stats["generations"] = gen
+    return tools.selBest(population, pop_size)
 
-        # Apply crossover
-        # zip does pairwise iteration over the offspring list and crossover is applied to each pair
-        for child1, child2 in zip(offspring[::2], offspring[1::2]): #offspring[::2] gives even indexed, offspring[1::2] gives odd indexed
-            if random.random() < cxpb:
-                toolbox.mate(child1, child2, indpb = 0.5)
-                del child1.fitness.values
-                del child2.fitness.values
 
-        # Apply mutation
-        for mutant in offspring:
-            if random.random() < mutpb:
-                toolbox.mutate(mutant)
-                del mutant.fitness.values
+def runIsland(task : dict) -> dict:
+    """Evolve one island for a number of generations (process pool worker).
 
-        # Re-evaluate individuals with invalid fitness
-        invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-        for ind in invalid_ind:
-            ind.fitness.values = toolbox.evaluate(ind, userInput)
+    The island's RNG state travels with the task, so the result does not
+    depend on which worker process runs it.
 
-        # Replace population 
-        population = offspring
+    Args:
+        task: Dict with 'genes' (list of gene lists, or None to create a
+            new population), 'fitnesses', 'rng_state', 'generations',
+            'userInput', 'pop_size', 'cxpb', 'mutpb' and 'toolbox_factory'.
 
-    # Return Best movies 
-    print(gen)
-    return tools.selBest(population, pop_size)
+    Returns:
+        Dict with the island's new 'genes', 'fitnesses' and 'rng_state'.
+    """
+    random.setstate(task["rng_state"])
+    toolbox = task["toolbox_factory"]()
+    userInput = task["userInput"]
+
+    if task["genes"] is None:
+        population = toolbox.population(n=task["pop_size"])
+        assignFitnesses(population, toolbox, userInput)
+    else:
+        population = [creator.Individual(genes) for genes in task["genes"]]
+        for ind, fit in zip(population, task["fitnesses"]):
+            ind.fitness.values = (fit,)
+
+    for _ in range(task["generations"]):
+        population = evolveGeneration(population, toolbox, userInput, task["cxpb"], task["mutpb"])
+
+    return {
+        "genes": [list(ind) for ind in population],
+        "fitnesses": [ind.fitness.values[0] for ind in population],
+        "rng_state": random.getstate()
+    }
+
+def migrate(islands : list, migrants : int):
+    """Ring migration: each island's best individuals replace the worst of the next island.
+
+    Args:
+        islands: List of island dicts as returned by `runIsland` (modified in place).
+        migrants: Number of individuals sent by each island.
+    """
+    outgoing = []
+    for island in islands:
+        order = np.argsort(island["fitnesses"], kind="stable")[:migrants]
+        outgoing.append([(list(island["genes"][i]), island["fitnesses"][i]) for i in order])
+    for i, island in enumerate(islands):
+        worst = np.argsort(island["fitnesses"], kind="stable")[::-1][:migrants]
+        for slot, (genes, fitness) in zip(worst, outgoing[i - 1]):
+            island["genes"][slot] = genes
+            island["fitnesses"][slot] = fitness
+
+def islandGeneticAlgorithm(userInput : dict, islands=4, pop_size=100, cxpb=0.2, mutpb=0.02, min_iter = 5, max_iter = 15,
+                           migration_interval=5, migrants=2, seed=None, processes=None, toolbox_factory=None, pool=None, stats=None):
+    """Run the genetic algorithm as several islands in a process pool.
+
+    Each island evolves its own population of `pop_size` individuals with
+    the usual operators in a worker process. Every `migration_interval`
+    generations the islands exchange their `migrants` best individuals
+    (ring topology). The stagnation rule of `geneticAlgorithm` is applied
+    to the best fitness over all islands at those synchronization points.
+    At the end all islands are merged and the best `pop_size` individuals
+    are returned.
+
+    Each island gets its own RNG stream derived from `seed`, so a run is
+    reproducible for a given seed and island count whatever the number
+    of processes. On platforms that spawn workers (Windows, macOS) the
+    calling script must be guarded by `if __name__ == "__main__":`.
+
+    Args:
+        userInput: Dict with user preference parameters used by the evaluator.
+        islands: Number of sub-populations.
+        pop_size: Population size of each island, and of the returned list.
+        cxpb: Crossover probability applied per pair of individuals.
+        mutpb: Mutation probability applied per individual.
+        min_iter: Minimum number of generations to run before allowing early stop.
+        max_iter: Maximum number of generations to run.
+        migration_interval: Generations between migrations.
+        migrants: Individuals sent by each island at each migration.
+        seed: Seed of the island RNG streams (random if None).
+        processes: Worker processes (defaults to min(islands, CPU count)).
+        toolbox_factory: Picklable callable returning the toolbox used by
+            the workers (`getToolbox` by default).
+        pool: Optional candidate pool (see `candidatePool`) passed to
+            `getToolbox` when no `toolbox_factory` is given.
+        stats: Optional dict that receives run statistics
+            (`generations`: number of generations run).
+
+    Returns:
+        The selected best individuals as returned by `tools.selBest`.
+    """
+    toolbox_factory = toolbox_factory or functools.partial(getToolbox, pool)
+    processes = processes or min(islands, multiprocessing.cpu_count())
+
+    rngStates = []
+    for islandSeed in np.random.SeedSequence(seed).generate_state(islands):
+        rng = random.Random(int(islandSeed))
+        rngStates.append(rng.getstate())
+
+    def task(island, rngState, generations):
+        return {
+            "genes": island and island["genes"], "fitnesses": island and island["fitnesses"],
+            "rng_state": rngState, "generations": generations, "userInput": userInput,
+            "pop_size": pop_size, "cxpb": cxpb, "mutpb": mutpb, "toolbox_factory": toolbox_factory
+        }
+
+    with multiprocessing.Pool(processes) as workers:
+        # Create and evaluate the initial populations
+        population = workers.map(runIsland, [task(None, state, 0) for state in rngStates])
+
+        best_prev = min(min(island["fitnesses"]) for island in population)
+        stagnation_counter = 0
+        gen = 0
+
+        while gen < max_iter and stagnation_counter < MAX_STAGNATION:
+            generations = min(migration_interval, max_iter - gen)
+            population = workers.map(runIsland, [task(island, island["rng_state"], generations) for island in population])
+            gen += generations
+
+            if gen > min_iter:
+                best_now = min(min(island["fitnesses"]) for island in population)
+                if best_now < best_prev:
+                    best_prev = best_now
+                    stagnation_counter = 0
+                else:
+                    stagnation_counter += 1
+
+            if len(population) > 1:
+                migrate(population, migrants)
+
+    merged = []
+    for island in population:
+        for genes, fitness in zip(island["genes"], island["fitnesses"]):
+            ind = creator.Individual(genes)
+            ind.fitness.values = (fitness,)
+            merged.append(ind)
+    if stats is not None:
+        stats["generations"] = gen
+    return tools.selBest(merged, pop_size)
 
 
 creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMin)
 
 
-def getToolbox():
+def candidatePool(userInput : dict, min_size=MIN_POOL_SIZE) -> np.ndarray:
+    """Pre-filter the catalog to the movies of the requested period sharing a requested genre.
+
+    Movies outside the pool always pay a period or genre penalty, so
+    sampling from the pool lets the GA converge in fewer generations.
+
+    Args:
+        userInput: Dict with the 'Periodo' range and the 'Generi' list.
+        min_size: Minimum pool size; smaller pools return None.
+
+    Returns:
+        A sorted int32 array of movie indices, or None to sample the whole catalog.
+    """
+    pool = dr.getStore().candidatePool(userInput["Periodo"], userInput["Generi"])
+    if len(pool) < min_size:
+        return None
+    return pool.astype(np.int32)
+
+def getToolbox(pool=None):
+    """Build the DEAP toolbox of the genetic algorithm.
+
+    Args:
+        pool: Optional array of movie indices (see `candidatePool`) that
+            initialization and mutation sample from. By default genes
+            range over the whole loaded catalog.
+    """
+    high = dr.getStore().size - 1
     toolbox = base.Toolbox()
-    toolbox.register("mutate", mutRandomReset, low=0, high=63248, indpb=0.2)
+    toolbox.pool = pool
+    toolbox.register("mutate", mutRandomReset, low=0, high=high, indpb=0.2, pool=pool)
     toolbox.register("select", selProbabilisticTournament, tournsize=3, p=0.7)
     toolbox.register("mate", cxUniformInts, indpb=0.5)
 
-    toolbox.register("movie_index", random.randint, 0, 63248)
+    toolbox.register("movie_index", randomMovie, 0, high, pool)
     toolbox.register("individual", tools.initRepeat, creator.Individual,
                     toolbox.movie_index, n=IND_SIZE)
     toolbox.register("population", tools.initRepeat, list, toolbox.individual)
     toolbox.register("evaluate", evaluate)
+    toolbox.register("evaluatePopulation", evaluatePopulation)
     return toolbox
\ No newline at end of file
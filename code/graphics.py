@@ -1,10 +1,18 @@
+import queue
 import tkinter as tk
 from tkinter import messagebox, ttk
 import datareader as dr
-from datareader import getMovieParameterList, extractRating, extractList
+from datareader import getMovies, extractRating, normalize
 
 root = None
 
+# Columns shown for each movie by MovieRaterGUI, in the order of `format_movie_info`
+RATER_COLUMNS = ["title", "duration", "rating", "description", "directors", "release_date", "genres"]
+
+# Columns shown by MovieExplanationGUI, in the order it unpacks them
+EXPLANATION_COLUMNS = ["title", "release_date", "duration", "rating",
+                       "description", "genres", "directors", "stars", "keywords"]
+
 class RangeSlider(tk.Canvas):
     def __init__(self, master, min_val, max_val, init_vals, width=300, height=60,
                  value_callback=None, **kwargs):
@@ -132,11 +140,7 @@ def promptGeneticInputs():
 
     root.protocol("WM_DELETE_WINDOW", on_close)
 
-    genres_available = [
-        "Action", "Adventure", "Animation", "Comedy", "Crime", "Drama",
-        "Fantasy", "Historical", "Horror", "Mystery", "Romance", "Sci-Fi",
-        "Sport", "Thriller", "War", "Western"
-    ]
+    genres_available = dr.GENRES
 
     # ------------------------
     # GENRES (CHECKBOXES)
@@ -232,8 +236,9 @@ class MovieRaterGUI:
 
         self.root.choices = None  # where results will be returned
 
-        # Select five random distinct indexes
+        # Select five random distinct indexes and fetch their details at once
         self.selected_indexes = random.sample(firstPhaseResult, 5)
+        self.movies = getMovies(self.selected_indexes, RATER_COLUMNS)
         self.current = 0
 
         # ---- CHOICES STRUCTURE ----
@@ -324,11 +329,7 @@ class MovieRaterGUI:
     def show_movie(self):
         """Display the current movie in the rating sequence, or finish if done."""
         if self.current < len(self.selected_indexes):
-            idx = self.selected_indexes[self.current]
-            info = getMovieParameterList(idx, [
-                "title", "duration", "rating", "description",
-                "directors", "release_date", "genres"
-            ])
+            info = [self.movies[column][self.current] for column in RATER_COLUMNS]
 
             self.title_label.config(text=info[0])
             self.info_label.config(text=self.format_movie_info(info))
@@ -384,20 +385,83 @@ def promptUserPreference(firstPhaseResult):
 
 # Add this to graphics.py
 class SimpleLoadingScreen:
-    def __init__(self):
-        """A minimal loading window with an indeterminate progress bar."""
+    def __init__(self, on_continue=None):
+        """A minimal loading window with a progress bar.
+
+        The bar is indeterminate until the first progress message arrives
+        (see `poll`).
+
+        Args:
+            on_continue: Optional callable run by the "Good enough, continue"
+                button, e.g. the `set` method of the GA's cancel event.
+                The button is hidden if None.
+        """
         self.root = tk.Tk()
         self.root.title("Processing")
-        self.root.geometry("300x120")
+        self.root.geometry("300x170")
         
         tk.Label(self.root, text="Calculating recommendations...", font=("Arial", 10)).pack(pady=10)
         
-        self.progress = ttk.Progressbar(self.root, mode='indeterminate', length=200)
+        self.progress = ttk.Progressbar(self.root, mode='indeterminate', length=200, maximum=100)
         self.progress.pack(pady=10)
         self.progress.start(10)
+
+        self.status = tk.Label(self.root, text="", font=("Arial", 9))
+        self.status.pack()
+
+        # Queue and pending `after` job of `poll`, so `close` can drain and cancel them
+        self.progress_queue = None
+        self.poll_job = None
+
+        self.on_continue = on_continue
+        if on_continue:
+            self.continue_button = tk.Button(self.root, text="Good enough, continue", command=self.continue_now)
+            self.continue_button.pack(pady=5)
+
+    def poll(self, progress_queue, interval=100):
+        """Show the messages of a GA progress queue, checking it every `interval` ms.
+
+        Args:
+            progress_queue: `queue.Queue` filled by `genutils.publishProgress`.
+            interval: Polling period in milliseconds.
+        """
+        self.progress_queue = progress_queue
+        self.show_progress()
+        self.poll_job = self.root.after(interval, self.poll, progress_queue, interval)
+
+    def show_progress(self):
+        """Show the latest message of the polled queue, discarding older ones."""
+        message = None
+        try:
+            while True:
+                message = self.progress_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        if message is not None:
+            if str(self.progress["mode"]) != "determinate":
+                self.progress.stop()
+                self.progress.configure(mode="determinate")
+            self.progress["value"] = 100 * message["fraction"]
+            self.status.configure(text=f"Generation {message['gen']}/{message['max_iter']} - best score {message['fitness']:.3f}")
+
+    def continue_now(self):
+        """Ask the running GA to stop and return its current best movies."""
+        self.continue_button.configure(state="disabled", text="Finishing...")
+        self.on_continue()
         
     def close(self):
-        """Close the loading window and stop its UI loop."""
+        """Close the loading window and stop its UI loop.
+
+        Pending polls are cancelled first: Tcl timers belong to the thread,
+        so they would otherwise keep firing in the next windows' mainloops
+        and touch the destroyed widgets.
+        """
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        if self.progress_queue is not None:
+            self.show_progress()
         self.root.destroy()
         
     def update(self):
@@ -406,7 +470,7 @@ class SimpleLoadingScreen:
 
         import tkinter as tk
 from tkinter import ttk
-from datareader import getMovieParameterList, extractRating
+from datareader import getMovies, extractRating
 
 class MovieExplanationGUI:
     def __init__(self, movie: int, preferences: dict):
@@ -421,11 +485,8 @@ class MovieExplanationGUI:
         self.root.geometry("700x600")
         self.root.resizable(False, False)
 
-        info = getMovieParameterList(
-            movie,
-            ["title", "release_date", "duration", "rating",
-             "description", "genres", "directors", "stars", "keywords"]
-        )
+        details = getMovies([movie], EXPLANATION_COLUMNS)
+        info = [details[column][0] for column in EXPLANATION_COLUMNS]
 
         (
             title, release_date, duration, rating,
@@ -433,10 +494,10 @@ class MovieExplanationGUI:
         ) = info
 
         rating = extractRating(rating)
-        genres =extractList(genres)
-        directors =extractList(directors)
-        stars =extractList(stars)
-        keywords =extractList(keywords)
+        genres =normalize(genres)
+        directors =normalize(directors)
+        stars =normalize(stars)
+        keywords =normalize(keywords)
         print(title)
         print(keywords)
         print(stars)
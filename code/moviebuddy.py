@@ -1,8 +1,17 @@
+import argparse
+import atexit
+import os
+import queue
 import threading
-from genutils import geneticAlgorithm, getToolbox
+import time
+from genutils import geneticAlgorithm, getToolbox, candidatePool
 from graphics import promptGeneticInputs, promptUserPreference, SimpleLoadingScreen, MovieExplanationGUI
+from graphics import RATER_COLUMNS, EXPLANATION_COLUMNS
+import datareader as dr
 from datareader import extractPreferences
 from secondphase import runSecondPhase
+from warmstart import SeedStore
+from tracing import tracer
 
 
 pop_size= 150
@@ -10,16 +19,46 @@ cxpb= 0.7
 mutpb= 0.11
 min_iter= 10
 max_iter= 20
-toolbox = getToolbox()
-
-
-userInput= promptGeneticInputs()
+engine= "ga" # "array" runs on a NumPy gene matrix, "exact" skips the evolution and returns the optimal candidates directly
+prefilter= True # sample only movies of the requested period and genres
+second_phase_scope= "candidates" # "catalog" re-ranks every movie after the feedback instead of the phase-one movies
+second_phase_top_k= 10 # only the best movies of the second phase are selected and returned
+warm_start= True # seed part of the initial population from earlier sessions and per-genre picks
+
+# Optional cap in seconds on phase one; the best movies found so far are used when it expires
+deadline_seconds = float(os.environ.get("MOVIEBUDDY_PHASE1_DEADLINE", 0)) or None
+
+# Opt-in stage timing trace (also enabled by MOVIEBUDDY_TRACE / MOVIEBUDDY_TRACE_PROFILE)
+parser = argparse.ArgumentParser(description="MovieBuddy movie recommender.")
+parser.add_argument("--trace", help="Write a Chrome trace JSON of the stage timings to this file")
+parser.add_argument("--profile-dir", help="Also dump a cProfile file per compute stage in this directory")
+args, _ = parser.parse_known_args()
+tracer.configure(args.trace, args.profile_dir)
+if tracer.enabled:
+    atexit.register(tracer.save)
+
+def load_dataset():
+    """Load the feature store, traced as the dataset load stage."""
+    with tracer.span("dataset load", "io"):
+        dr.getStore()
+
+# Load the scoring columns in the background while the user fills in the first dialog
+threading.Thread(target=load_dataset, name="dataset-load", daemon=True).start()
+
+with tracer.span("promptGeneticInputs", "gui"):
+    userInput= promptGeneticInputs()
 
 if(userInput == None):
     exit()
 
+with tracer.span("getToolbox", prefilter=prefilter):
+    toolbox = getToolbox(candidatePool(userInput) if prefilter else None)
+    seedStore = SeedStore() if warm_start else None
+
 # --- START OF LOADING SCREEN LOGIC ---
-loading = SimpleLoadingScreen()
+progress = queue.Queue()
+cancel = threading.Event() # set by the "Good enough, continue" button
+loading = SimpleLoadingScreen(on_continue=cancel.set)
 # Use a container to get the result out of the thread
 results_container = []
 
@@ -31,38 +70,64 @@ def run_ga():
     appends the returned value to `results_container` and quits the
     loading window's mainloop to continue the main UI flow.
     """
-    res = geneticAlgorithm(
-        toolbox=toolbox,
-        userInput=userInput,
-        pop_size=pop_size,
-        cxpb=cxpb,
-        mutpb=mutpb,
-        min_iter=min_iter,
-        max_iter=max_iter
-    )
+    with tracer.span("geneticAlgorithm", engine=engine, pop_size=pop_size):
+        res = geneticAlgorithm(
+            toolbox=toolbox,
+            userInput=userInput,
+            pop_size=pop_size,
+            cxpb=cxpb,
+            mutpb=mutpb,
+            min_iter=min_iter,
+            max_iter=max_iter,
+            engine=engine,
+            progress=progress,
+            deadline=time.monotonic() + deadline_seconds if deadline_seconds else None,
+            cancel=cancel,
+            warm_start=seedStore
+        )
     results_container.append(res)
     loading.root.quit() 
 
 # Start the genetic algorithm in the background
-threading.Thread(target=run_ga, daemon=True).start()
+threading.Thread(target=run_ga, name="genetic-algorithm", daemon=True).start()
 
-# Show the loading window
-loading.root.mainloop() 
+# Show the loading window and its progress
+with tracer.span("loading screen", "wait"):
+    loading.poll(progress)
+    loading.root.mainloop() 
 
 # Once mainloop ends, grab the result and close the window
 firstPhaseResults = results_container[0]
 loading.close()
 # --- END OF LOADING SCREEN LOGIC ---
 
-inputPreferences = promptUserPreference(firstPhaseResults[0])
-preferences = extractPreferences(inputPreferences)
+if seedStore:
+    with tracer.span("warm start save", "io"):
+        seedStore.record(userInput, firstPhaseResults)
+        seedStore.save()
+
+# Read the displayed columns before each dialog opens, so the gui spans only hold user time
+with tracer.span("load movie details", "io"):
+    dr.getCatalog(RATER_COLUMNS)
+with tracer.span("promptUserPreference", "gui"):
+    inputPreferences = promptUserPreference(firstPhaseResults[0])
+with tracer.span("extractPreferences"):
+    preferences = extractPreferences(inputPreferences)
 
 secondPhaseInput = userInput | preferences
-finalResult = runSecondPhase(firstPhaseResults, secondPhaseInput)
-MovieExplanationGUI(finalResult[0], preferences)
+with tracer.span("runSecondPhase", scope=second_phase_scope):
+    finalResult = runSecondPhase(firstPhaseResults, secondPhaseInput, scope=second_phase_scope, top_k=second_phase_top_k)
+with tracer.span("load movie details", "io"):
+    dr.getCatalog(EXPLANATION_COLUMNS)
+with tracer.span("MovieExplanationGUI", "gui"):
+    MovieExplanationGUI(finalResult[0], preferences)
 
 print(finalResult)
 
+if tracer.enabled:
+    print("Stage time per category (ms):", {category: round(ms, 1) for category, ms in tracer.summary().items()})
+    print(f"Trace saved as: {tracer.path}")
+
 
 
 
@@ -0,0 +1,93 @@
+"""LRU cache of full-catalog penalty vectors.
+
+The fitness is a sum of independent per-movie components (PP, PL, PG,
+PS), each depending on a single user preference. This module caches one
+vector per component and preference value, so a new query that only
+changes, say, the length slider recomputes one vector and reuses the
+other three.
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Without an explicit cap, the cache always has room for this many of the largest vectors seen
+SCALED_VECTORS = 8
+
+class PenaltyCache:
+    """Bounded LRU cache of penalty vectors keyed by component inputs.
+
+    Args:
+        max_bytes: Memory cap for the stored vectors. Least recently used
+            vectors are evicted once the cap is exceeded. If None, the cap
+            is DEFAULT_MAX_BYTES or SCALED_VECTORS times the largest
+            vector seen, whichever is larger, so it grows with the catalog.
+        dtype: Storage dtype of the vectors. Use numpy.float16 to fit four
+            times as many vectors in the same memory, at the cost of
+            about three significant digits of precision.
+    """
+
+    def __init__(self, max_bytes=None, dtype=np.float64):
+        self.max_bytes = max_bytes
+        self.largest = 0
+        self.dtype = np.dtype(dtype)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def limit(self, nbytes=0) -> int:
+        """Return the memory cap in bytes, once vectors of `nbytes` bytes are stored."""
+        if self.max_bytes is not None:
+            return self.max_bytes
+        return max(DEFAULT_MAX_BYTES, SCALED_VECTORS * max(self.largest, nbytes))
+
+    def fits(self, length : int, count : int = 1) -> bool:
+        """Tell whether `count` vectors of `length` values can be cached together without evicting each other."""
+        nbytes = length * self.dtype.itemsize
+        return count * nbytes <= self.limit(nbytes)
+
+    def get(self, key, compute):
+        """Return the vector stored under `key`, computing it on a miss.
+
+        Args:
+            key: Hashable key, e.g. ("PL", 90, 0.5).
+            compute: Zero-argument callable returning the vector.
+
+        Returns:
+            The cached (read-only) vector.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        vector = np.asarray(compute(), dtype=self.dtype)
+        vector.flags.writeable = False
+
+        with self.lock:
+            self.largest = max(self.largest, vector.nbytes)
+            limit = self.limit()
+            if key not in self.entries and vector.nbytes <= limit:
+                self.entries[key] = vector
+                self.nbytes += vector.nbytes
+                while self.nbytes > limit:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+        return vector
+
+    def clear(self):
+        """Drop every cached vector and reset the hit/miss counters."""
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
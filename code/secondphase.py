@@ -1,15 +1,8 @@
-import eval
+import numpy as np
 import datareader as dr
 from eval import calculatePList, calculatePL, calculatePP, calculatePS, maxPublicationDistance
-from datareader import extractList, extractDuration, extractRating, extractYear, getMovieParameterList 
-
-DURATION_INDEX = 0
-RATING_INDEX = 1
-RELEASEDATE_INDEX = 2
-GENRES_INDEX = 3
-DIRECTORS_INDEX = 4
-ACTORS_INDEX = 5
-KEYWORDS_INDEX = 6
+from eval import calculatePPArray, calculatePLArray, calculatePSArray, calculatePListCounts
+from genutils import genrePenalties, componentPenalties
 
 weightPublication = 10/maxPublicationDistance 
 weightLength = 0.5
@@ -36,14 +29,14 @@ def evaluateSecondPhase (movie, userInput:dict):
     """
     totalScore = 0.0
 
-    movieParameterList = getMovieParameterList(movie, ["duration", "rating", "release_date", "genres", "directors", "stars", "keywords"])
-    movieReleaseYear = extractYear(movieParameterList[RELEASEDATE_INDEX])
-    movieDuration = extractDuration(movieParameterList[DURATION_INDEX])
-    movieGenres = extractList(movieParameterList[GENRES_INDEX])
-    movieRating =  extractRating(movieParameterList[RATING_INDEX].item())
-    movieDirectors = extractList(movieParameterList[DIRECTORS_INDEX])
-    #movieActors = extractList(movieParameterList[ACTORS_INDEX])
-    movieKeywords = extractList(movieParameterList[KEYWORDS_INDEX])
+    store = dr.getStore()
+    movieReleaseYear = int(store.year[movie])
+    movieDuration = int(store.minutes[movie])
+    movieGenres = store.genres[movie]
+    movieRating = float(store.rating[movie])
+    movieDirectors = store.directors[movie]
+    #movieActors = store.stars[movie]
+    movieKeywords = store.keywords[movie]
 
     PP = calculatePP(movieReleaseYear, userInput.get("Periodo"), weightPublication) 
     PL = calculatePL(movieDuration, userInput.get("Lunghezza"), weightLength)
@@ -67,31 +60,153 @@ def evaluateSecondPhase (movie, userInput:dict):
     totalScore += P
     return totalScore, 
 
-def runSecondPhase(firstPhaseResults, secondPhaseInput):
+def listPenalties(column, movies : np.ndarray, inputList : list, weightList : float) -> np.ndarray:
+    """Vectorized `calculatePList(normalize=True)` over a CSR list column.
+
+    The user's names are mapped to integer ids once and matched against
+    every movie's ids with a single bincount.
+
+    Args:
+        column: A `datareader.ListColumn` (directors, stars or keywords).
+        movies: Array of movie indices, or None for every movie of the catalog.
+        inputList: User-provided names to match against.
+        weightList: Weight to scale the result.
+
+    Returns:
+        A float array with one penalty per entry of `movies`.
+    """
+    matchingItems = column.matchCounts(column.lookup(inputList), movies)
+    lengths = column.lengths() if movies is None else column.lengths()[movies]
+    return calculatePListCounts(matchingItems, lengths, len(inputList or []), weightList)
+
+def evaluateCandidates(movies, userInput : dict) -> np.ndarray:
+    """Evaluate many movies at once with the second-phase criteria.
+
+    Array version of `evaluateSecondPhase`; scores are identical.
+
+    Args:
+        movies: Iterable of movie indices.
+        userInput: Dict with preferences (period, length, genres and like/dislike lists).
+
+    Returns:
+        A float array with the total penalty of each movie (lower is better).
+    """
+    store = dr.getStore()
+    movies = np.asarray(movies, dtype=np.intp)
+
+    PP = calculatePPArray(store.year[movies], userInput.get("Periodo"), weightPublication)
+    PL = calculatePLArray(store.minutes[movies], userInput.get("Lunghezza"), weightLength)
+    PG = genrePenalties(movies, userInput.get("Generi"), weightGenres)
+    PS = calculatePSArray(store.rating[movies], weightScore)
+
+    PR = listPenalties(store.directors, movies, userInput.get("directors+"), weightDirectors) \
+        - listPenalties(store.directors, movies, userInput.get("directors-"), weightDirectors)
+    PT = listPenalties(store.keywords, movies, userInput.get("keywords+"), weightKeywords) \
+        - listPenalties(store.keywords, movies, userInput.get("keywords-"), weightKeywords)
+
+    return PP + PL + PG + PS + PR + PT
+
+def catalogSecondPhasePenalties(userInput : dict) -> np.ndarray:
+    """Evaluate every movie of the catalog with the second-phase criteria.
+
+    PP, PL, PG and PS come from the cached full-catalog vectors of
+    `genutils.componentPenalties`; PR and PT are matched over the whole
+    list columns in one pass each. Scores equal `evaluateCandidates`.
+
+    Args:
+        userInput: Dict with preferences (period, length, genres and like/dislike lists).
+
+    Returns:
+        A float array with the total penalty of each movie, indexed by movie.
+    """
+    store = dr.getStore()
+    PP, PL, PG, PS = componentPenalties(userInput)
+
+    PR = listPenalties(store.directors, None, userInput.get("directors+"), weightDirectors) \
+        - listPenalties(store.directors, None, userInput.get("directors-"), weightDirectors)
+    PT = listPenalties(store.keywords, None, userInput.get("keywords+"), weightKeywords) \
+        - listPenalties(store.keywords, None, userInput.get("keywords-"), weightKeywords)
+
+    return PP + PL + PG + PS + PR + PT
+
+def topCandidates(scores : np.ndarray, k : int) -> np.ndarray:
+    """Return the positions of the k lowest scores, best first, without a full sort.
+
+    `argpartition` finds the k-th lowest score in linear time and only the
+    k selected entries are sorted. Ties are broken by position, as a
+    stable sort of the whole array would.
+
+    Args:
+        scores: Float array of penalties.
+        k: Number of positions to return (all of them if k >= len(scores)).
+
+    Returns:
+        An int array of at most k positions into `scores`.
+    """
+    if k >= len(scores):
+        return np.argsort(scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = scores[np.argpartition(scores, k - 1)[k - 1]]
+    better = np.flatnonzero(scores < kth)
+    chosen = np.concatenate([better, np.flatnonzero(scores == kth)[:k - len(better)]])
+    return chosen[np.argsort(scores[chosen], kind="stable")]
+
+def expandCandidates(movies, userInput : dict) -> np.ndarray:
+    """Add every movie sharing a liked director or keyword to the candidates.
+
+    Uses the inverted indexes of the feature store, so the cost is
+    proportional to the posting lists touched rather than the catalog.
+
+    Args:
+        movies: Iterable of candidate movie indices.
+        userInput: Dict with the 'directors+' and 'keywords+' preferences.
+
+    Returns:
+        A sorted array of distinct movie indices.
+    """
+    store = dr.getStore()
+    return np.union1d(np.asarray(list(movies), dtype=np.intp), np.concatenate([
+        store.directors.moviesWith(store.directors.lookup(userInput.get("directors+"))),
+        store.keywords.moviesWith(store.keywords.lookup(userInput.get("keywords+")))
+    ]))
+
+def runSecondPhase(firstPhaseResults, secondPhaseInput, expand=True, scope="candidates", top_k=None):
     """Run the second phase ranking over candidates from phase one.
 
     The first phase returns a collection of candidate individuals.
-    This function evaluates each unique movie in those individuals
-    using `evaluateSecondPhase`, sorts them by score and returns the
-    best movie, along with the general results.
+    This function takes every unique movie in those individuals, adds
+    the movies sharing a liked director or keyword (see
+    `expandCandidates`), evaluates them in one batch using
+    `evaluateCandidates`, selects the best ones with `topCandidates` and
+    returns the best movie, along with the general results. With
+    scope="catalog" every movie of the catalog is re-ranked instead
+    (`catalogSecondPhasePenalties`).
 
     Args:
         firstPhaseResults: Iterable of individuals (lists of movie indices).
         secondPhaseInput: User preference dict augmented with phase-2 preferences.
+        expand: If False, only score the movies found by the first phase.
+        scope: "candidates" (the phase-one movies) or "catalog" (every movie).
+        top_k: Number of movies in the returned list (all scored movies if None).
 
     Returns:
         A tuple: (best_individual_index, best_score, scored_list) where scored_list is
         a list of (score, movie_index) tuples sorted ascending by score.
     """ 
-    scored = []
-    toCheck = {elem for individual in firstPhaseResults for elem in individual}
-
-
-    for elem in toCheck:
-        score = evaluateSecondPhase(elem, secondPhaseInput)
-        scored.append((score, elem))
-
-    scored.sort(key=lambda x: x[0])  # lowest score = best
+    if scope == "catalog":
+        scores = catalogSecondPhasePenalties(secondPhaseInput)
+        toCheck = np.arange(len(scores))
+    elif scope == "candidates":
+        toCheck = np.array(sorted({elem for individual in firstPhaseResults for elem in individual}), dtype=np.intp)
+        if expand:
+            toCheck = expandCandidates(toCheck, secondPhaseInput)
+        scores = evaluateCandidates(toCheck, secondPhaseInput)
+    else:
+        raise ValueError(f"Unknown scope: {scope}")
+
+    best = topCandidates(scores, len(scores) if top_k is None else top_k) # lowest score = best
+    scored = [((float(scores[i]),), int(toCheck[i])) for i in best]
     
     (best_score, best_individual) = scored[0]
     return best_individual, best_score, scored
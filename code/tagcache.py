@@ -0,0 +1,63 @@
+"""Persistent cache of extracted tags, keyed by content.
+
+`tagmaker` stores the tags of every description it processes in a
+SQLite file, under the SHA-256 of the description together with a
+fingerprint of everything else that decides the tags (blacklist, tag
+limit, spaCy model and version). A later run only sends descriptions
+that are new, edited, or affected by a configuration change through spaCy.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+# SQLite limits the number of parameters of a single statement
+QUERY_CHUNK = 500
+
+def content_key(fingerprint: str, text: str) -> str:
+    """Return the cache key of a description under a configuration fingerprint."""
+    return hashlib.sha256((fingerprint + "\0" + text).encode("utf-8")).hexdigest()
+
+class TagCache:
+    """SQLite-backed mapping from content keys to tag lists.
+
+    Args:
+        path: Database file (created if missing).
+
+    Attributes:
+        hits: Keys found by `get_many` since the cache was opened.
+        misses: Keys not found by `get_many` since the cache was opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS tags (key TEXT PRIMARY KEY, tags TEXT NOT NULL)")
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys) -> dict:
+        """Return the cached tags of the given keys as a dict (missing keys are left out)."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys[start:start + QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for key, tags in self.connection.execute(f"SELECT key, tags FROM tags WHERE key IN ({placeholders})", chunk):
+                found[key] = json.loads(tags)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict):
+        """Store (or replace) the tags of many keys in one transaction."""
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO tags (key, tags) VALUES (?, ?)",
+                                        ((key, json.dumps(tags)) for key, tags in items.items()))
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
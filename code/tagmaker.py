@@ -9,13 +9,21 @@ Dependencies:
     - spaCy with the "en_core_web_sm" model installed.
 
 Run this file as a script to read `INPUT_CSV`, extract
-tags and write `OUTPUT_CSV`.
+tags and write `OUTPUT_CSV`, or with `--output-parquet` to stream the
+tagged catalog to a parquet file chunk by chunk. Descriptions are streamed through
+`nlp.pipe` in batches, optionally over several processes
+(`--batch-size`, `--n-process`).
 """
 
 import pandas as pd
 import spacy
 from collections import Counter
 import argparse
+import hashlib
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tagcache import TagCache, content_key
 
 # -------------------------------
 # CONFIG
@@ -24,6 +32,16 @@ INPUT_CSV = "dataset.csv"
 OUTPUT_CSV = "dataset_refined_keywords3.csv"
 MAX_TAGS_PER_MOVIE = 3
 
+# Descriptions per spaCy batch and worker processes of `nlp.pipe`
+BATCH_SIZE = 256
+N_PROCESS = 1
+
+# Rows per chunk (and parquet row group) in streaming mode
+CHUNK_SIZE = 10000
+
+# Tags of already processed descriptions (see `tagcache`)
+CACHE_FILE = "tag_cache.sqlite"
+
 DESCRIPTION_COLUMN = "description"
 KEYWORDS_COLUMN = "keywords"
 
@@ -61,9 +79,13 @@ BLACKLIST = {
     "according"
 }
 
+# Pipeline components the tag extraction does not use. Noun chunks need
+# the parser, POS tags and lemmas; named entities are never read.
+DISABLED_COMPONENTS = ["ner"]
+
 # Load spaCy English model
 
-nlp = spacy.load("en_core_web_sm")
+nlp = spacy.load("en_core_web_sm", disable=DISABLED_COMPONENTS)
 
 # tag extraction function
 def extract_movie_tags(description: str, max_tags=6) -> list:
@@ -73,6 +95,18 @@ def extract_movie_tags(description: str, max_tags=6) -> list:
         return []
 
     doc = nlp(description.lower()) #spacy doc object contains grammatical info 
+    return tags_from_doc(doc, max_tags)
+
+def tags_from_doc(doc, max_tags=6) -> list:
+    """Extract up to `max_tags` noun tags from a parsed (lowercased) description.
+
+    Args:
+        doc: spaCy Doc of the lowercased description.
+        max_tags: Maximum number of tags to return.
+
+    Returns:
+        The most frequent single-word noun lemmas, most frequent first.
+    """
     candidates = []
     #chunks are sintactic units identified by spacy
     for chunk in doc.noun_chunks: #noun chunks are phrases centered around a noun automatically extracted by spacy
@@ -117,6 +151,65 @@ def extract_movie_tags(description: str, max_tags=6) -> list:
     ranked = [tag for tag, _ in Counter(candidates).most_common(max_tags)]
     return ranked
 
+def cache_fingerprint(max_tags: int) -> str:
+    """Return a digest of the settings that decide the tags: blacklist, tag limit and spaCy model."""
+    settings = {
+        "blacklist": sorted(BLACKLIST),
+        "max_tags": max_tags,
+        "model": f"{nlp.meta['lang']}_{nlp.meta['name']}-{nlp.meta['version']}"
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+def tag_descriptions(descriptions, max_tags=6, batch_size=BATCH_SIZE, n_process=N_PROCESS, cache=None) -> list:
+    """Extract tags for many descriptions by streaming them through `nlp.pipe`.
+
+    Gives the same tags as calling `extract_movie_tags` on each
+    description; missing or empty descriptions get no tags. Repeated
+    descriptions are parsed once, and with a `cache` only descriptions
+    missing from it are parsed (the new results are added to it).
+
+    Args:
+        descriptions: Iterable of descriptions (strings or missing values).
+        max_tags: Maximum number of tags per description.
+        batch_size: Descriptions per spaCy batch.
+        n_process: Worker processes used by spaCy.
+        cache: Optional `tagcache.TagCache`.
+
+    Returns:
+        A list with the list of tags of each description, in input order.
+    """
+    descriptions = list(descriptions)
+    tags = [[] for _ in descriptions]
+
+    # Lowercased text -> positions holding it
+    pending = {}
+    for i, desc in enumerate(descriptions):
+        if desc and isinstance(desc, str):
+            pending.setdefault(desc.lower(), []).append(i)
+
+    keys = {}
+    if cache is not None:
+        fingerprint = cache_fingerprint(max_tags)
+        keys = {text: content_key(fingerprint, text) for text in pending}
+        cached = cache.get_many(keys.values())
+        for text in list(pending):
+            if keys[text] in cached:
+                for i in pending.pop(text):
+                    tags[i] = list(cached[keys[text]])
+
+    results = {}
+    texts = ((text, text) for text in pending)
+    for count, (doc, text) in enumerate(nlp.pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process), start=1):
+        results[text] = tags_from_doc(doc, max_tags)
+        for i in pending[text]:
+            tags[i] = list(results[text])
+        if count % 500 == 0:
+            print(f"Processed {count} movies")
+
+    if cache is not None:
+        cache.put_many({keys[text]: result for text, result in results.items()})
+    return tags
+
 def format_tags_for_csv(tags: list) -> str:
     """Format a list of tags for CSV storage.
 
@@ -135,21 +228,132 @@ def format_tags_for_csv(tags: list) -> str:
     return "[" + ", ".join(f"'{t}'" for t in tags) + "]"
 
 
+def read_chunks(path: str, chunk_size: int):
+    """Yield the rows of a CSV or parquet file as DataFrames of at most `chunk_size` rows."""
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+def chunk_schema(chunk: pd.DataFrame, keywords_col: str) -> pa.Schema:
+    """Derive the output schema of a streaming run from its first chunk.
+
+    The keywords column becomes list<string>. Integer columns are stored
+    as float64 and all-missing columns as strings, so that later chunks
+    with missing values still fit the schema. `pd.read_csv` reads an
+    all-missing column as float64, so it is the missing values, not the
+    Arrow type, that mark such a column.
+    """
+    fields = []
+    for field in pa.Schema.from_pandas(chunk, preserve_index=False):
+        if field.name == keywords_col:
+            field = field.with_type(pa.list_(pa.string()))
+        elif chunk[field.name].isna().all():
+            field = field.with_type(pa.string())
+        elif pa.types.is_integer(field.type):
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    if keywords_col not in chunk.columns:
+        fields.append(pa.field(keywords_col, pa.list_(pa.string())))
+    return pa.schema(fields)
+
+def fit_chunk(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Convert a chunk to a table with the schema fixed by the first chunk.
+
+    Columns stored as strings are cast to strings first, so a column that
+    was empty in the first chunk accepts whatever values appear later.
+    """
+    chunk = chunk[schema.names].copy()
+    for field in schema:
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            chunk[field.name] = chunk[field.name].astype("string")
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+def stream_to_parquet(input_file: str, output_parquet: str, description_col: str, keywords_col: str,
+                      chunk_size: int = CHUNK_SIZE, batch_size: int = BATCH_SIZE, n_process: int = N_PROCESS, cache=None) -> int:
+    """Tag a catalog chunk by chunk and write it straight to a parquet file.
+
+    Each chunk of `chunk_size` rows is tagged with `tag_descriptions` and
+    appended to the output as one row group, so memory use does not grow
+    with the catalog. Keywords are stored as a native list<string> column.
+
+    Args:
+        input_file: CSV or parquet catalog.
+        output_parquet: Parquet file to write.
+        description_col: Column holding the descriptions.
+        keywords_col: Column receiving the tags (replaced if present).
+        chunk_size: Rows per chunk and row group.
+        batch_size: Descriptions per spaCy batch.
+        n_process: Worker processes used by spaCy.
+        cache: Optional `tagcache.TagCache`.
+
+    Returns:
+        The number of rows written.
+    """
+    writer = None
+    rows = 0
+    try:
+        for chunk in read_chunks(input_file, chunk_size):
+            if description_col not in chunk.columns:
+                raise ValueError(f"Column '{description_col}' not found in {input_file}")
+            chunk[keywords_col] = tag_descriptions(chunk[description_col], MAX_TAGS_PER_MOVIE, batch_size, n_process, cache)
+
+            if writer is None:
+                schema = chunk_schema(chunk, keywords_col)
+                writer = pq.ParquetWriter(output_parquet, schema)
+            writer.write_table(fit_chunk(chunk, schema))
+            rows += len(chunk)
+            print(f"Written {rows} movies")
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
 def main(input_csv: str = None,
          output_csv: str = None,
          description_col: str = None,
-         keywords_col: str = None):
+         keywords_col: str = None,
+         batch_size: int = None,
+         n_process: int = None,
+         cache_file: str = None,
+         use_cache: bool = True,
+         output_parquet: str = None,
+         chunk_size: int = None):
     """Script entry point: read input CSV, extract tags, save output CSV.
 
-    This function iterates over the `DESCRIPTION_COLUMN` values in the
-    input file, extracts up to `MAX_TAGS_PER_MOVIE` tags per row, formats
-    them for CSV and writes the result to `OUTPUT_CSV`.
+    This function streams the description column of the input file
+    through `tag_descriptions`, extracts up to `MAX_TAGS_PER_MOVIE` tags
+    per row, formats them for CSV and writes the result to `OUTPUT_CSV`.
+    Descriptions already tagged with the same settings are read from the
+    tag cache (`CACHE_FILE`) unless `use_cache` is False.
+
+    With `output_parquet` the input is instead streamed in chunks of
+    `chunk_size` rows straight to a parquet file (see `stream_to_parquet`)
+    and no CSV is written.
     """
     # resolve parameters: use provided values or fall back to module defaults
     input_csv = input_csv or INPUT_CSV
     output_csv = output_csv or OUTPUT_CSV
     description_col = description_col or DESCRIPTION_COLUMN
     keywords_col = keywords_col or KEYWORDS_COLUMN
+    batch_size = batch_size or BATCH_SIZE
+    n_process = n_process or N_PROCESS
+    cache_file = cache_file or CACHE_FILE
+    chunk_size = chunk_size or CHUNK_SIZE
+
+    if output_parquet:
+        print("Streaming dataset...")
+        cache = TagCache(cache_file) if use_cache else None
+        try:
+            rows = stream_to_parquet(input_csv, output_parquet, description_col, keywords_col, chunk_size, batch_size, n_process, cache)
+        finally:
+            if cache is not None:
+                print(f"Tag cache: {cache.hits} hits, {cache.misses} misses")
+                cache.close()
+        print("Done.")
+        print(f"Saved {rows} movies as: {output_parquet}")
+        return
 
     print("Loading dataset...")
     df = pd.read_csv(input_csv)
@@ -157,17 +361,15 @@ def main(input_csv: str = None,
     if description_col not in df.columns:
         raise ValueError(f"Column '{description_col}' not found in {input_csv}")
 
-    refined_keywords = []
-
     print("Extracting refined tags...")
-    for i, desc in enumerate(df[DESCRIPTION_COLUMN]):
-        tags = extract_movie_tags(desc, MAX_TAGS_PER_MOVIE)
-        refined_keywords.append(format_tags_for_csv(tags))
-
-        if i > 0 and i % 500 == 0:
-            print(f"Processed {i} movies")
-
-    df[keywords_col] = refined_keywords
+    cache = TagCache(cache_file) if use_cache else None
+    try:
+        tags = tag_descriptions(df[description_col], MAX_TAGS_PER_MOVIE, batch_size, n_process, cache)
+    finally:
+        if cache is not None:
+            print(f"Tag cache: {cache.hits} hits, {cache.misses} misses")
+            cache.close()
+    df[keywords_col] = [format_tags_for_csv(t) for t in tags]
 
     print("Saving new dataset...")
     df.to_csv(output_csv, index=False)
@@ -181,9 +383,21 @@ if __name__ == "__main__":
     parser.add_argument("--output-csv", dest="output_csv", help="Path to output CSV", default=OUTPUT_CSV)
     parser.add_argument("--description-column", dest="description_col", help="Name of the description column", default=DESCRIPTION_COLUMN)
     parser.add_argument("--keywords-column", dest="keywords_col", help="Name of the keywords column to write", default=KEYWORDS_COLUMN)
+    parser.add_argument("--output-parquet", dest="output_parquet", help="Stream the tagged dataset to this parquet file instead of writing a CSV", default=None)
+    parser.add_argument("--chunk-size", dest="chunk_size", type=int, help="Rows per chunk (and row group) when streaming to parquet", default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", dest="batch_size", type=int, help="Descriptions per spaCy batch", default=BATCH_SIZE)
+    parser.add_argument("--n-process", dest="n_process", type=int, help="Worker processes for spaCy", default=N_PROCESS)
+    parser.add_argument("--cache-file", dest="cache_file", help="SQLite file caching the tags of processed descriptions", default=CACHE_FILE)
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Tag every description without reading or updating the cache")
 
     args = parser.parse_args()
     main(input_csv=args.input_csv,
          output_csv=args.output_csv,
          description_col=args.description_col,
-         keywords_col=args.keywords_col)
+         keywords_col=args.keywords_col,
+         batch_size=args.batch_size,
+         n_process=args.n_process,
+         cache_file=args.cache_file,
+         use_cache=args.use_cache,
+         output_parquet=args.output_parquet,
+         chunk_size=args.chunk_size)
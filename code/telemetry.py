@@ -0,0 +1,130 @@
+"""Per-generation telemetry for the genetic algorithm.
+
+A `GenerationRecorder` passed to `genutils.geneticAlgorithm` records,
+for every generation, the best and mean fitness, the stagnation counter,
+the number of evaluations, the time spent in each step of the loop
+(select, clone, mate, mutate, evaluate) and the penalty cache hits. The
+records can be exported as JSON lines or as a DEAP Logbook.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from deap import tools
+
+PHASES = ("select", "clone", "mate", "mutate", "evaluate")
+
+class GenerationRecorder:
+    """Collects one record per generation of a GA run.
+
+    Attributes:
+        records: List of dicts, one per generation (generation 0 is the
+            initial population).
+        max_iter: Generation limit of the recorded run.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.max_iter = None
+        self.cache = None
+        self.evaluations = 0
+        self.current = None
+        self.started = None
+
+    def start_run(self, max_iter : int, cache=None):
+        """Reset the recorder at the start of a run.
+
+        Args:
+            max_iter: Generation limit of the run.
+            cache: Optional PenaltyCache whose hits/misses are recorded.
+        """
+        self.records = []
+        self.max_iter = max_iter
+        self.cache = cache
+        self.evaluations = 0
+        self.current = None
+
+    def start_generation(self, gen : int):
+        """Open the record of generation `gen`."""
+        self.started = time.perf_counter()
+        self.current = {"gen": gen, "evaluations": 0}
+        self.current.update({f"{phase}_time": 0.0 for phase in PHASES})
+        if self.cache is not None:
+            self.current["cache_hits"] = -self.cache.hits
+            self.current["cache_misses"] = -self.cache.misses
+
+    @contextmanager
+    def phase(self, name : str):
+        """Context manager adding the time spent in its block to phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[f"{name}_time"] += time.perf_counter() - start
+
+    def count_evaluations(self, count : int):
+        """Add `count` fitness evaluations to the current generation."""
+        self.current["evaluations"] += count
+        self.evaluations += count
+
+    def end_generation(self, population, stagnation : int):
+        """Close the current record with statistics of the resulting population.
+
+        Args:
+            population: The evaluated population at the end of the generation.
+            stagnation: Current value of the stagnation counter.
+        """
+        self.end_generation_fitness([ind.fitness.values[0] for ind in population], stagnation)
+
+    def end_generation_fitness(self, fitnesses, stagnation : int):
+        """Close the current record from the fitness values of the resulting population.
+
+        Used by `arrayga`, which keeps the fitness in an array and has no
+        individuals to pass to `end_generation`.
+
+        Args:
+            fitnesses: Sequence (or array) of the population's fitness values.
+            stagnation: Current value of the stagnation counter.
+        """
+        self.current.update({
+            "best": float(min(fitnesses)),
+            "mean": float(sum(fitnesses) / len(fitnesses)),
+            "stagnation": stagnation,
+            "total_evaluations": self.evaluations,
+            "wall_time": time.perf_counter() - self.started
+        })
+        if self.cache is not None:
+            self.current["cache_hits"] += self.cache.hits
+            self.current["cache_misses"] += self.cache.misses
+        self.records.append(self.current)
+        self.current = None
+
+    def summary(self) -> dict:
+        """Return run-level totals: generations, generations saved by early stopping, time per phase."""
+        generations = self.records[-1]["gen"] if self.records else 0
+        summary = {
+            "generations": generations,
+            "max_iter": self.max_iter,
+            "generations_saved": (self.max_iter - generations) if self.max_iter is not None else None,
+            "evaluations": self.evaluations,
+            "best": self.records[-1]["best"] if self.records else None
+        }
+        for key in [f"{phase}_time" for phase in PHASES] + ["wall_time", "cache_hits", "cache_misses"]:
+            if self.records and key in self.records[0]:
+                summary[key] = sum(record[key] for record in self.records)
+        return summary
+
+    def to_jsonl(self, path : str):
+        """Write one JSON object per generation to `path`."""
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+    def to_logbook(self) -> tools.Logbook:
+        """Return the records as a DEAP Logbook."""
+        logbook = tools.Logbook()
+        if self.records:
+            logbook.header = list(self.records[0].keys())
+        for record in self.records:
+            logbook.record(**record)
+        return logbook
@@ -1,12 +1,26 @@
-import itertools
-from datetime import datetime
-from genutils import *
-from graphics import promptGeneticInputs
+"""Parameter sweep over the genetic algorithm settings.
+
+Runs every combination of `PARAM_SPACE` for every user profile of a
+fixture file, spread over a process pool. Each run is recorded (profile,
+parameters, seed, score, generations, wall time) in a directory of
+parquet files. Runs already present there are skipped, so an
+interrupted sweep can simply be restarted.
 
-toolbox = getToolbox()
+`python test.py --profiles profiles.json --results sweep_results --workers 8`
+"""
 
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from datetime import datetime
+import pandas as pd
+from genutils import geneticAlgorithm, getToolbox, evaluate
 
-userInput= promptGeneticInputs()
 # Define parameter search space
 PARAM_SPACE = {
     "pop_size":  [10, 20, 30, 40, 50, 75, 100, 150],
@@ -16,52 +30,140 @@ PARAM_SPACE = {
     "max_iter":  [50, 75, 100, 150]
 }
 
+PROFILES_FILE = "profiles.json"
+RESULTS_DIR = "sweep_results"
+
+# Finished runs are written to a new parquet part every FLUSH_EVERY runs
+FLUSH_EVERY = 200
+
+toolbox = None
+
 # Generate all combinations of parameters
 def generate_param_grid(param_space):
     keys = list(param_space.keys())
     values = list(param_space.values())
-    
+
     for combo in itertools.product(*values):
         yield dict(zip(keys, combo))
 
-# Run mass tests over the parameter grid
-def run_mass_tests():
-    total_tests = 1
-    for values in PARAM_SPACE.values():
-        total_tests *= len(values)
+def load_profiles(path: str) -> dict:
+    """Read user profiles from a JSON fixture file.
+
+    The file holds a list of objects with a `name`, the `Generi` list,
+    the `Lunghezza` bracket and the `Periodo` as an inclusive
+    [start, end] pair, like the values chosen in the first GUI dialog.
+
+    Args:
+        path: Path to the JSON file.
+
+    Returns:
+        A dict mapping profile name to a userInput dict.
+    """
+    with open(path) as f:
+        profiles = json.load(f)
+    return {
+        profile["name"]: {
+            "Periodo": range(profile["Periodo"][0], profile["Periodo"][1] + 1),
+            "Lunghezza": profile["Lunghezza"],
+            "Generi": profile["Generi"]
+        }
+        for profile in profiles
+    }
+
+def run_key(profile: str, params: dict) -> str:
+    """Return a stable identifier for one (profile, parameters) run."""
+    return profile + "|" + json.dumps(params, sort_keys=True)
+
+def run_seed(key: str) -> int:
+    """Derive the RNG seed of a run from its key, so reruns are reproducible."""
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], "little")
+
+def run_config(job: tuple) -> dict:
+    """Run the genetic algorithm once (process pool worker).
+
+    Args:
+        job: Tuple (profile name, userInput, params).
+
+    Returns:
+        A dict describing the run, one row of the results.
+    """
+    global toolbox
+    if toolbox is None:
+        toolbox = getToolbox()
+
+    profile, userInput, params = job
+    key = run_key(profile, params)
+    seed = run_seed(key)
+    random.seed(seed)
+
+    stats = {}
+    start = time.perf_counter()
+    firstPhaseResult = geneticAlgorithm(toolbox=toolbox, userInput=userInput, stats=stats, **params)
+    wall_time = time.perf_counter() - start
+
+    # Evaluate this iteration's result
+    score = evaluate(firstPhaseResult[0], userInput)[0]
+
+    return {"key": key, "profile": profile, **params, "seed": seed, "score": score,
+            "generations": stats["generations"], "wall_time": wall_time,
+            "finished_at": datetime.now().isoformat()}
+
+def completed_keys(results_dir: str) -> set:
+    """Return the keys of the runs already recorded in `results_dir`."""
+    if not os.path.isdir(results_dir) or not any(name.endswith(".parquet") for name in os.listdir(results_dir)):
+        return set()
+    return set(pd.read_parquet(results_dir, columns=["key"])["key"])
+
+def write_part(rows: list, results_dir: str):
+    """Append finished runs to the results as a new parquet part."""
+    if not rows:
+        return
+    os.makedirs(results_dir, exist_ok=True)
+    name = f"part-{datetime.now():%Y%m%d-%H%M%S-%f}.parquet"
+    pd.DataFrame(rows).to_parquet(os.path.join(results_dir, name), index=False)
 
-    print(f"Total tests to run: {total_tests}")
+# Run mass tests over the parameter grid
+def run_mass_tests(profiles: dict, results_dir: str = RESULTS_DIR, workers: int = None):
+    done = completed_keys(results_dir)
+    jobs = [(name, userInput, params)
+            for name, userInput in profiles.items()
+            for params in generate_param_grid(PARAM_SPACE)
+            if run_key(name, params) not in done]
+    total_tests = len(jobs) + len(done)
+
+    print(f"Total tests: {total_tests}, already done: {len(done)}")
     print("Starting...\n")
 
-    with open("tests.txt", "a") as f:
-        f.write(f"\n=== MASS TEST SESSION [{datetime.now()}] ===\n")
-
-        for i, params in enumerate(generate_param_grid(PARAM_SPACE), start=1):
-
-            # Run the genetic algorithm with the current parameter set
-            firstPhaseResult = geneticAlgorithm(
-                toolbox=toolbox,
-                userInput=userInput,
-                pop_size=params["pop_size"],
-                cxpb=params["cxpb"],
-                mutpb=params["mutpb"],
-                min_iter=params["min_iter"],
-                max_iter=params["max_iter"]
-            )
-
-            # Evaluate this iteration's result
-            score = evaluate(firstPhaseResult[0], userInput)
-
-            # Log the result
-            f.write(f"Test {i}/{total_tests}: {params} -> Score = {score}\n")
-
-            # Optional console feedback
-            print(f"[{i}/{total_tests}] {params} -> Score={score}")
+    pending = []
+    with multiprocessing.Pool(workers) as pool:
+        for i, row in enumerate(pool.imap_unordered(run_config, jobs, chunksize=4), start=len(done) + 1):
+            pending.append(row)
+            print(f"[{i}/{total_tests}] {row['key']} -> Score={row['score']}")
+            if len(pending) >= FLUSH_EVERY:
+                write_part(pending, results_dir)
+                pending = []
+    write_part(pending, results_dir)
 
     print("\nAll tests completed.\n")
 
-
-# Run tests
-run_mass_tests()
-
-
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the genetic algorithm parameters.")
+    parser.add_argument("--profiles", help="JSON file with the user profiles", default=PROFILES_FILE)
+    parser.add_argument("--results", help="Directory of the parquet results", default=RESULTS_DIR)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)", default=None)
+    parser.add_argument("--gui", action="store_true", help="Ask for a single profile with the input dialog instead")
+
+    args = parser.parse_args()
+    if args.gui:
+        from graphics import promptGeneticInputs
+        userInput = promptGeneticInputs()
+        if userInput is None:
+            raise SystemExit()
+        period = userInput["Periodo"]
+        name = f"gui {period.start}-{period.stop - 1} {userInput['Lunghezza']}min {'+'.join(userInput['Generi'])}"
+        profiles = {name: userInput}
+    else:
+        profiles = load_profiles(args.profiles)
+
+    # Run tests
+    run_mass_tests(profiles, args.results, args.workers)
@@ -0,0 +1,20 @@
+"""Tests of the catalog validation in `convert`."""
+
+import pytest
+import datareader as dr
+from conftest import CATALOG
+from convert import validateCatalog
+
+@pytest.mark.parametrize("duration, minutes", [("1h 30m", 90), ("2h", 120), ("45m", 45), (" 3h  5m ", 185), ("30m 1h", 90)])
+def test_valid_durations_are_parsed(duration, minutes):
+    frame = CATALOG.assign(duration=duration)
+
+    assert "malformed duration" not in validateCatalog(frame)
+    assert (dr.parseDurationColumn(frame["duration"]) == minutes).all()
+
+@pytest.mark.parametrize("duration", ["1h30m", "90", "1.5h", "1h:30m", "h"])
+def test_unparseable_durations_are_reported(duration):
+    frame = CATALOG.assign(duration=duration)
+
+    assert validateCatalog(frame)["malformed duration"]["count"] == len(frame)
+    assert (dr.parseDurationColumn(frame["duration"]) == 0).all()
@@ -0,0 +1,36 @@
+"""Tests of the batch phase-one evaluators against the scalar `evaluate`."""
+
+import itertools
+import numpy as np
+import pytest
+import datareader as dr
+import genutils
+from conftest import CATALOG
+from eval import calculatePList
+from genutils import evaluate, evaluatePopulation, genrePenalties, weightGenres
+from penaltycache import PenaltyCache
+
+USER_INPUTS = [
+    {"Periodo": range(1990, 2011), "Lunghezza": 110, "Generi": ["Drama", "Crime", "Thriller"]},
+    {"Periodo": range(1960, 1971), "Lunghezza": 60, "Generi": ["Musical", "Sci-Fi"]},
+    {"Periodo": range(2020, 2025), "Lunghezza": 180, "Generi": []}
+]
+
+@pytest.mark.parametrize("userInput", USER_INPUTS)
+@pytest.mark.parametrize("max_bytes", [None, 1])
+def test_evaluate_population_matches_evaluate(store, monkeypatch, userInput, max_bytes):
+    # max_bytes=1 leaves no room for the catalog vectors and exercises the uncached path
+    monkeypatch.setattr(genutils, "penaltyCache", PenaltyCache(max_bytes=max_bytes))
+    population = [list(movies) for movies in itertools.combinations(range(store.size), genutils.IND_SIZE)]
+
+    expected = [evaluate(individual, userInput)[0] for individual in population]
+
+    np.testing.assert_array_equal(evaluatePopulation(population, userInput), expected)
+
+@pytest.mark.parametrize("genres", [["Drama"], ["Drama", "Crime", "Thriller"], ["Musical", "Music"], [], None])
+def test_genre_penalties_match_list_function(store, genres):
+    # Rows 1 and 5 list a genre twice, rows 2 and 3 have no genres, "Musical" is not in the catalog
+    expected = [calculatePList(dr.normalize(value), genres, weightGenres) for value in CATALOG["genres"]]
+
+    np.testing.assert_array_equal(genrePenalties(np.arange(store.size), genres, weightGenres), expected)
+    np.testing.assert_array_equal(genrePenalties(np.array([5, 1, 5]), genres, weightGenres), [expected[5], expected[1], expected[5]])
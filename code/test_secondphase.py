@@ -0,0 +1,27 @@
+"""Tests of the batch second-phase evaluators against the scalar `evaluateSecondPhase`."""
+
+import numpy as np
+import pytest
+from secondphase import evaluateSecondPhase, evaluateCandidates, catalogSecondPhasePenalties
+
+SECOND_PHASE_INPUTS = [
+    {"Periodo": range(1990, 2011), "Lunghezza": 110, "Generi": ["Drama", "Crime"],
+     "directors+": ["Frank Darabont", "Ang Lee"], "directors-": ["Christopher Nolan"],
+     "keywords+": ["prison", "hope"], "keywords-": ["dream", "unknown keyword"]},
+    {"Periodo": range(1960, 1971), "Lunghezza": 60, "Generi": ["Musical"],
+     "directors+": ["Nobody"], "directors-": [], "keywords+": [], "keywords-": ["heist"]},
+    {"Periodo": range(2020, 2025), "Lunghezza": 180, "Generi": []}
+]
+
+@pytest.mark.parametrize("userInput", SECOND_PHASE_INPUTS)
+def test_evaluate_candidates_matches_evaluate_second_phase(store, userInput):
+    movies = np.array([7, 0, 5, 5, 3, 1])
+    expected = [evaluateSecondPhase(movie, userInput)[0] for movie in movies]
+
+    np.testing.assert_array_equal(evaluateCandidates(movies, userInput), expected)
+
+@pytest.mark.parametrize("userInput", SECOND_PHASE_INPUTS)
+def test_catalog_penalties_match_evaluate_candidates(store, userInput):
+    expected = evaluateCandidates(np.arange(store.size), userInput)
+
+    np.testing.assert_array_equal(catalogSecondPhasePenalties(userInput), expected)
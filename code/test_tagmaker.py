@@ -0,0 +1,30 @@
+"""Tests of the chunked parquet output of `tagmaker`."""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import spacy
+
+if not spacy.util.is_package("en_core_web_sm"):
+    pytest.skip("tagmaker needs the en_core_web_sm model", allow_module_level=True)
+
+import tagmaker
+
+def test_column_empty_in_first_chunk_accepts_later_text(tmp_path):
+    input_csv = tmp_path / "input.csv"
+    output_parquet = tmp_path / "output.parquet"
+    pd.DataFrame({
+        "title": [f"Movie {i}" for i in range(25)],
+        "description": ["A detective chases a thief across the city."] * 25,
+        "note": [np.nan] * 10 + ["x"] * 15
+    }).to_csv(input_csv, index=False)
+
+    rows = tagmaker.stream_to_parquet(str(input_csv), str(output_parquet), "description", "keywords", chunk_size=7)
+
+    assert rows == 25
+    assert pq.ParquetFile(output_parquet).schema_arrow.field("note").type == pa.string()
+    output = pd.read_parquet(output_parquet)
+    assert output["note"].isna().sum() == 10
+    assert output["note"].iloc[10:].tolist() == ["x"] * 15
@@ -0,0 +1,50 @@
+"""Tests of the stage timing trace."""
+
+import json
+import threading
+from tracing import Tracer
+
+def test_nested_profiled_spans(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.json"), str(tmp_path / "profiles"))
+    with tracer.span("outer"):
+        with tracer.span("inner", "io"):
+            sum(range(1000))
+    tracer.save()
+
+    events = {event["name"]: event for event in json.load(open(tmp_path / "trace.json"))["traceEvents"] if event["ph"] == "X"}
+    assert set(events) == {"outer", "inner"}
+    assert "profile" in events["outer"]["args"]
+    assert "profile" not in events["inner"]["args"]
+    assert len(list((tmp_path / "profiles").iterdir())) == 1
+
+def test_concurrent_profiled_spans(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.json"), str(tmp_path / "profiles"))
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def load():
+        try:
+            with tracer.span("dataset load", "io"):
+                started.set()
+                release.wait(5)
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=load)
+    thread.start()
+    started.wait(5)
+    with tracer.span("getToolbox"):
+        sum(range(1000))
+    release.set()
+    thread.join()
+
+    assert not errors
+    names = [event["name"] for event in tracer.events if event["ph"] == "X"]
+    assert sorted(names) == ["dataset load", "getToolbox"]
+    assert tracer.summary().keys() == {"compute", "io"}
+
+    # Profiling is free again once both spans are closed
+    with tracer.span("extractPreferences"):
+        pass
+    assert "profile" in tracer.events[-1]["args"]
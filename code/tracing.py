@@ -0,0 +1,144 @@
+"""Opt-in timing trace of the moviebuddy pipeline.
+
+When enabled, every traced stage (dataset load, compute stages, GUI
+waits) records its wall and CPU time, and the trace is saved as a
+Chrome trace JSON file (open it in chrome://tracing or Perfetto). GUI
+stages are recorded in the "gui" category, so user think time is kept
+apart from compute time. Compute stages can also be profiled with
+cProfile, one `.prof` file per stage.
+
+Enable it with `python moviebuddy.py --trace trace.json` or by setting
+MOVIEBUDDY_TRACE to the output path; MOVIEBUDDY_TRACE_PROFILE (or
+`--profile-dir`) sets the directory of the cProfile dumps.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+
+# Categories whose stages are profiled when a profile directory is set
+PROFILED_CATEGORIES = ("compute", "io")
+
+# Held while a stage is profiled. Python 3.12+ allows one active profiler
+# per process, so a stage that starts while another one is profiled (nested,
+# or in another thread) is timed but not profiled.
+profileLock = threading.Lock()
+
+class Tracer:
+    """Records stages as Chrome trace "complete" events.
+
+    Args:
+        path: Output JSON file; tracing is disabled if None.
+        profile_dir: Optional directory receiving one cProfile dump per
+            compute or io stage (see `profileLock`).
+    """
+
+    def __init__(self, path=None, profile_dir=None):
+        self.path = path
+        self.profile_dir = profile_dir
+        self.events = []
+        self.threads = set()
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Build a tracer from MOVIEBUDDY_TRACE and MOVIEBUDDY_TRACE_PROFILE."""
+        return cls(os.environ.get("MOVIEBUDDY_TRACE") or None, os.environ.get("MOVIEBUDDY_TRACE_PROFILE") or None)
+
+    def configure(self, path=None, profile_dir=None):
+        """Enable tracing to `path` (and profiling to `profile_dir`); None keeps the current value."""
+        self.path = path or self.path
+        self.profile_dir = profile_dir or self.profile_dir
+
+    def span(self, name : str, category="compute", **args):
+        """Context manager recording the block as a stage.
+
+        Args:
+            name: Stage name.
+            category: "compute", "io" or "gui" (time spent waiting for the user).
+            **args: Extra values stored with the event.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name, category, args)
+
+    @contextlib.contextmanager
+    def _span(self, name, category, args):
+        profiler = None
+        if self.profile_dir and category in PROFILED_CATEGORIES and profileLock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError: #another profiling tool is active
+                profiler = None
+                profileLock.release()
+
+        start = time.perf_counter()
+        threadStart = time.thread_time()
+        processStart = time.process_time()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                profileLock.release()
+            end = time.perf_counter()
+            args = dict(args,
+                        thread_cpu_ms=(time.thread_time() - threadStart) * 1000,
+                        process_cpu_ms=(time.process_time() - processStart) * 1000)
+            if profiler:
+                args["profile"] = self._dump(profiler, name)
+            self._record({
+                "name": name, "cat": category, "ph": "X",
+                "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+                "args": args
+            })
+
+    def _dump(self, profiler, name) -> str:
+        """Write a cProfile dump of one stage and return its path."""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with self.lock:
+            index = len(self.events)
+        path = os.path.join(self.profile_dir, f"{index:02d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def _record(self, event : dict):
+        thread = threading.current_thread()
+        event.update({"pid": os.getpid(), "tid": thread.native_id})
+        with self.lock:
+            if thread.native_id not in self.threads:
+                self.threads.add(thread.native_id)
+                self.events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.native_id,
+                                    "args": {"name": thread.name}})
+            self.events.append(event)
+
+    def summary(self) -> dict:
+        """Return the total wall time in ms per category (e.g. compute vs gui)."""
+        totals = {}
+        for event in self.events:
+            if event["ph"] == "X":
+                totals[event["cat"]] = totals.get(event["cat"], 0.0) + event["dur"] / 1000
+        return totals
+
+    def save(self, path=None):
+        """Write the trace as Chrome trace JSON to `path` (the configured path by default)."""
+        path = path or self.path
+        if path is None:
+            return
+        with self.lock:
+            events = list(self.events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+# Process-wide tracer, disabled unless MOVIEBUDDY_TRACE is set or `configure` is called
+tracer = Tracer.from_env()
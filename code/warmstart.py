@@ -0,0 +1,175 @@
+"""Warm-start seeds for the first phase of the genetic algorithm.
+
+A `SeedStore` persists, in a JSON file, the best individuals of previous
+sessions together with the inputs that produced them, and for every genre
+a precomputed list of low-penalty movies (best rated among the movies of
+that genre). `geneticAlgorithm(warm_start=...)` builds part of its initial
+population from these seeds and leaves the rest random for diversity.
+
+Movie indices are only meaningful for one catalog, so the file records
+the catalog it was built for and is discarded when the catalog changes.
+"""
+
+import json
+import os
+import random
+import numpy as np
+import datareader as dr
+from eval import calculatePSArray
+from genutils import genrePenalties, moviePenalties, IND_SIZE, weightGenres, weightScore
+
+# Path of the seed file. Override it with the MOVIEBUDDY_WARMSTART environment variable.
+WARM_START_PATH = os.environ.get("MOVIEBUDDY_WARMSTART", os.path.join(os.path.dirname(os.path.abspath(__file__)), "warmstart.json"))
+
+MAX_SESSIONS = 50 # oldest sessions are dropped beyond this
+SESSION_SEEDS = 20 # best individuals kept per session
+GENRE_SEEDS = 100 # precomputed movies per genre
+MIN_SIMILARITY = 0.5 # sessions less similar than this to the query are ignored
+LENGTH_SCALE = 60 # minutes of length difference that make two inputs dissimilar
+
+def catalogSignature() -> dict:
+    """Describe the loaded catalog: its row count and the size/mtime of the dataset file."""
+    signature = {"rows": int(dr.getStore().size)}
+    if os.path.exists(dr.DATASET_PATH):
+        stat = os.stat(dr.DATASET_PATH)
+        signature.update({"size": stat.st_size, "mtime": int(stat.st_mtime)})
+    return signature
+
+def describeInput(userInput : dict) -> dict:
+    """Return the JSON form of a phase-one userInput (period as inclusive [start, end])."""
+    period = userInput["Periodo"]
+    return {"Periodo": [period.start, period.stop - 1], "Lunghezza": userInput["Lunghezza"], "Generi": sorted(userInput["Generi"] or [])}
+
+def similarity(first : dict, second : dict) -> float:
+    """Similarity in [0, 1] of two inputs in the form of `describeInput`.
+
+    The product of the Jaccard index of the genres, the overlap ratio of
+    the periods and a length term falling linearly to 0 at LENGTH_SCALE
+    minutes of difference.
+    """
+    genres1, genres2 = set(first["Generi"]), set(second["Generi"])
+    genres = len(genres1 & genres2) / len(genres1 | genres2) if genres1 | genres2 else 1.0
+
+    (start1, end1), (start2, end2) = first["Periodo"], second["Periodo"]
+    overlap = max(0, min(end1, end2) - max(start1, start2) + 1)
+    period = overlap / (max(end1, end2) - min(start1, start2) + 1)
+
+    length = max(0.0, 1 - abs(first["Lunghezza"] - second["Lunghezza"]) / LENGTH_SCALE)
+    return genres * period * length
+
+def precomputeGenreSeeds(top=GENRE_SEEDS) -> dict:
+    """Return, for every genre of `dr.GENRES`, its `top` lowest-penalty movies.
+
+    Movies are ranked by the input-independent part of the fitness: the
+    genre penalty of a single-genre query plus the rating penalty.
+    """
+    store = dr.getStore()
+    seeds = {}
+    for genre in dr.GENRES:
+        movies = np.flatnonzero(store.genreMask & store.compileGenreMask([genre]))
+        if len(movies) > top:
+            penalties = genrePenalties(movies, [genre], weightGenres) + calculatePSArray(store.rating[movies], weightScore)
+            movies = movies[np.argsort(penalties, kind="stable")[:top]]
+        seeds[genre] = sorted(int(m) for m in movies)
+    return seeds
+
+class SeedStore:
+    """Persisted warm-start seeds.
+
+    Args:
+        path: JSON file holding the seeds (created by `save`).
+        fraction: Share of the initial population taken from seeds.
+    """
+
+    def __init__(self, path=WARM_START_PATH, fraction=0.5):
+        self.path = path
+        self.fraction = fraction
+        self.sessions = []
+        self.genres = None
+        self.load()
+
+    def load(self):
+        """Read the seed file, ignoring it if missing, unreadable or built for another catalog."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("catalog") != catalogSignature():
+            return
+        self.sessions = data.get("sessions", [])
+        self.genres = data.get("genres")
+
+    def save(self):
+        """Write the seeds to `path` (atomically, through a temporary file)."""
+        data = {"catalog": catalogSignature(), "sessions": self.sessions, "genres": self.genres}
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, self.path)
+
+    def record(self, userInput : dict, population : list):
+        """Remember the best individuals of a finished session.
+
+        Args:
+            userInput: The phase-one input of the session.
+            population: Final individuals, best first (as returned by `geneticAlgorithm`).
+        """
+        individuals = []
+        for ind in population:
+            genes = [int(g) for g in ind]
+            if genes not in individuals:
+                individuals.append(genes)
+            if len(individuals) == SESSION_SEEDS:
+                break
+        self.sessions.append({"input": describeInput(userInput), "individuals": individuals})
+        del self.sessions[:-MAX_SESSIONS]
+
+    def sessionSeeds(self, userInput : dict, count : int) -> list:
+        """Return up to `count` individuals of the most similar previous sessions."""
+        query = describeInput(userInput)
+        scored = [(similarity(query, session["input"]), i) for i, session in enumerate(self.sessions)]
+        scored = sorted(((score, i) for score, i in scored if score >= MIN_SIMILARITY), reverse=True)
+
+        seeds = []
+        for _, i in scored:
+            for genes in self.sessions[i]["individuals"]:
+                if len(seeds) == count:
+                    return seeds
+                if genes not in seeds:
+                    seeds.append(genes)
+        return seeds
+
+    def genreSeeds(self, userInput : dict, count : int) -> list:
+        """Return up to `count` individuals made of the precomputed movies of the requested genres.
+
+        The movies of the requested genres are ranked by their full penalty
+        for `userInput`. The first individual holds the IND_SIZE best ones,
+        the others are random samples of the 4 * IND_SIZE best.
+        """
+        if count <= 0 or not userInput["Generi"]:
+            return []
+        if self.genres is None:
+            self.genres = precomputeGenreSeeds()
+
+        movies = np.array(sorted({m for genre in userInput["Generi"] for m in self.genres.get(genre, [])}), dtype=np.intp)
+        if len(movies) < IND_SIZE:
+            return []
+        best = movies[np.argsort(moviePenalties(movies, userInput), kind="stable")[:4 * IND_SIZE]].tolist()
+
+        seeds = [best[:IND_SIZE]]
+        for _ in range(count - 1):
+            seeds.append(random.sample(best, IND_SIZE))
+        return seeds
+
+    def seeds(self, userInput : dict, count : int) -> list:
+        """Return up to `count` seed individuals (gene lists) for `userInput`.
+
+        Half of them come from similar previous sessions and half from the
+        genre seeds; either source fills in for the other when it runs short.
+        """
+        fromSessions = self.sessionSeeds(userInput, count)
+        fromGenres = self.genreSeeds(userInput, count - min(len(fromSessions), count - count // 2))
+        return fromSessions[:count - len(fromGenres)] + fromGenres